@@ -0,0 +1,53 @@
+"""Throughput of synchronous vs. write-behind completions.
+
+Run from the project root:
+    python -m benchmarks.bench_completion_writes --habits 2000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.habit_tracker import HabitTracker
+from src.infra.database import configure_database, init_db
+from src.infra.write_buffer import CompletionWriteBuffer
+
+
+def run(tracker: HabitTracker, habit_count: int) -> float:
+    habit_ids = [
+        tracker.create_habit(
+            {"name": f"Habit {i}", "periodicity": "daily", "start_date": "2025-01-01"}
+        )
+        for i in range(habit_count)
+    ]
+
+    start = time.perf_counter()
+    for habit_id in habit_ids:
+        tracker.complete_habit(habit_id)
+    if tracker.write_buffer is not None:
+        tracker.write_buffer.close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, make_buffer in [
+            ("synchronous", lambda: None),
+            ("write-behind", CompletionWriteBuffer),
+        ]:
+            configure_database(Path(tmp) / f"{label}.db")
+            init_db()
+            elapsed = run(HabitTracker(write_buffer=make_buffer()), args.habits)
+            print(
+                f"{label:>12}: {args.habits} completions in {elapsed:.3f}s "
+                f"({args.habits / elapsed:,.0f}/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
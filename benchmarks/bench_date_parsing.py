@@ -0,0 +1,64 @@
+"""Cost of decoding completion dates.
+
+Compares the old strptime-based decoder with parse_date and the bulk
+parse_ordinals API over a column of dates drawn from ten years of days.
+
+Run from the project root:
+    python -m benchmarks.bench_date_parsing --count 10000000
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from src.infra.date_utils import parse_date, parse_ordinals
+
+
+def strptime_date(s: str) -> date:
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000_000)
+    parser.add_argument(
+        "--baseline-count",
+        type=int,
+        default=200_000,
+        help="Dates decoded with strptime (slow, so extrapolated to --count)",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = date(2015, 1, 1)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(3653)]
+    column = [rng.choice(days) for _ in range(args.count)]
+
+    t = time.perf_counter()
+    for s in column[: args.baseline_count]:
+        strptime_date(s)
+    strptime_per_date = (time.perf_counter() - t) / args.baseline_count
+
+    t = time.perf_counter()
+    for s in column:
+        parse_date(s)
+    parse_date_per_date = (time.perf_counter() - t) / args.count
+
+    t = time.perf_counter()
+    parse_ordinals(column)
+    bulk_per_date = (time.perf_counter() - t) / args.count
+
+    for label, per_date in [
+        ("strptime", strptime_per_date),
+        ("parse_date", parse_date_per_date),
+        ("parse_ordinals", bulk_per_date),
+    ]:
+        print(
+            f"{label:>15}: {per_date * 1e9:7.0f}ns/date, "
+            f"{per_date * args.count:6.2f}s for {args.count:,} dates"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Streaks for every habit: SQLite versus a memory-mapped ordinal snapshot.
+
+Seeds a synthetic dataset, then times get_streaks() against the database
+and stream_snapshot_streaks() over a snapshot exported from it, including
+the time to open the snapshot.
+
+Run from the project root:
+    python -m benchmarks.bench_ordinal_snapshot --habits 10000 --years 2
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.analytics import get_streaks, stream_snapshot_streaks
+from src.infra.database import configure_database, init_db
+from src.infra.ordinal_snapshot import OrdinalSnapshot, export_ordinal_snapshot
+from src.infra.seeding import seed_habits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "bench.db")
+        init_db()
+        habits, completions = seed_habits(args.habits, args.years)
+        print(f"{habits:,} habits, {completions:,} completions")
+
+        t = time.perf_counter()
+        expected = get_streaks()
+        sqlite_seconds = time.perf_counter() - t
+
+        path = Path(tmp) / "bench.ord"
+        t = time.perf_counter()
+        export_ordinal_snapshot(path)
+        export_seconds = time.perf_counter() - t
+
+        t = time.perf_counter()
+        with OrdinalSnapshot(path) as snapshot:
+            streaks = [
+                {"id": s["id"], "streak": s["streak"]}
+                for s in stream_snapshot_streaks(snapshot)
+            ]
+        snapshot_seconds = time.perf_counter() - t
+        assert streaks == expected
+
+        print(f"{'sqlite':>9}: {sqlite_seconds:6.2f}s")
+        print(f"{'export':>9}: {export_seconds:6.2f}s ({path.stat().st_size:,} bytes)")
+        print(f"{'snapshot':>9}: {snapshot_seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-call latency of the hot read queries.
+
+Compares the module-level query functions (new connection per call) with
+HabitDAO (one connection, cached statements, reused cursor).
+
+Run from the project root:
+    python -m benchmarks.bench_queries --calls 5000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.infra.dao import HabitDAO
+from src.infra.database import (
+    add_completions,
+    add_habit,
+    configure_database,
+    init_db,
+    query_completions_by_habit_id,
+    query_habit_by_id,
+    query_latest_completion_by_habit_id,
+)
+
+
+def time_per_call(func, habit_id: int, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(habit_id)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "bench.db")
+        init_db()
+        habit_id = add_habit(
+            {"name": "Bench", "periodicity": "daily", "start_date": "2020-01-01"}
+        )
+        assert habit_id is not None
+        add_completions(
+            [
+                {"habit_id": habit_id, "completion_date": f"2024-01-{day:02d}"}
+                for day in range(1, 29)
+            ]
+        )
+
+        dao = HabitDAO()
+        for label, function_call, dao_call in [
+            ("habit_by_id", query_habit_by_id, dao.habit_by_id),
+            (
+                "completions_by_habit_id",
+                query_completions_by_habit_id,
+                dao.completions_by_habit_id,
+            ),
+            (
+                "latest_completion_by_habit_id",
+                query_latest_completion_by_habit_id,
+                dao.latest_completion_by_habit_id,
+            ),
+        ]:
+            per_call = time_per_call(function_call, habit_id, args.calls)
+            per_dao_call = time_per_call(dao_call, habit_id, args.calls)
+            print(
+                f"{label:>30}: {per_call:8.1f}us/call -> {per_dao_call:6.1f}us/call "
+                f"with HabitDAO ({per_call / per_dao_call:.0f}x)"
+            )
+        dao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Every registered streak engine, checked against the reference oracle and timed.
+
+Loads randomized histories (all periodicities, boundary gaps, duplicates,
+out-of-order inserts) into an in-memory database, then runs each engine
+from tests/streak_harness.py, failing if any disagrees with the oracle.
+
+Run from the project root:
+    python -m benchmarks.bench_streak_engines --habits 2000 --years 5
+"""
+
+import argparse
+import datetime
+import time
+
+from src.infra.database import configure_database, init_db
+from tests.streak_harness import check_engines, load_random_histories
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_database(":memory:")
+    init_db()
+    today = datetime.date.today()
+
+    t = time.perf_counter()
+    histories = load_random_histories(args.habits, args.years, today, args.seed)
+    completions = sum(len(dates) for _, dates in histories.values())
+    print(
+        f"{len(histories):,} habits, {completions:,} completions "
+        f"loaded in {time.perf_counter() - t:.2f}s"
+    )
+
+    for name, seconds in check_engines(histories, today).items():
+        print(f"{name:>18}: {seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
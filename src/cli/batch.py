@@ -0,0 +1,81 @@
+import json
+import shlex
+
+import click
+
+# Leading program names that are dropped, so shell scripts can be piped in
+PROGRAM_NAMES = {"habit", "./habit"}
+
+# Lines without these split the same way with str.split, which is much faster
+SHELL_QUOTING = ("'", '"', "\\")
+
+
+def parse_batch_line(line: str, group: click.Group) -> list[str] | None:
+    """Turns one line of a batch script into command-line arguments.
+
+    Lines are either in the usual CLI syntax (`complete 3 --format json`) or
+    JSON: an array of arguments, or an object naming the command and its
+    parameters (`{"command": "complete", "habit_id": 3}`).
+
+    Returns:
+        list[str] | None: Arguments for the group, or None for blank lines
+            and # comments
+
+    Raises:
+        click.UsageError: If a JSON object names an unknown command or field
+        ValueError: If the line is not valid JSON or shell syntax
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    if line[0] == "{":
+        return _json_object_args(json.loads(line), group)
+    if line[0] == "[":
+        args = [str(arg) for arg in json.loads(line)]
+    elif any(char in line for char in SHELL_QUOTING):
+        args = shlex.split(line)
+    else:
+        args = line.split()
+
+    if args and args[0] in PROGRAM_NAMES:
+        args = args[1:]
+    return args
+
+
+def _json_object_args(record: dict, group: click.Group) -> list[str]:
+    fields = dict(record)
+    name = fields.pop("command", None)
+    command = group.commands.get(name) if isinstance(name, str) else None
+    if command is None:
+        raise click.UsageError(f"No such command {name!r}.")
+
+    args = _param_args(group, fields) + [name] + _param_args(command, fields)
+    if fields:
+        raise click.UsageError(
+            f"Unknown fields for {name!r}: {', '.join(sorted(fields))}."
+        )
+    return args
+
+
+def _param_args(command: click.Command, fields: dict) -> list[str]:
+    """Pops the fields that are parameters of command and renders them as arguments."""
+    args = []
+    for param in command.params:
+        keys = {param.name} | {opt.lstrip("-").replace("-", "_") for opt in param.opts}
+        key = next((k for k in keys if k in fields), None)
+        if key is None:
+            continue
+        value = fields.pop(key)
+        # Lists fill variadic arguments and repeatable options, one per item
+        values = value if isinstance(value, list) else [value]
+
+        if isinstance(param, click.Argument):
+            args += [str(item) for item in values]
+        elif isinstance(param, click.Option) and param.is_flag:
+            if value:
+                args.append(param.opts[0])
+        else:
+            for item in values:
+                args += [param.opts[0], str(item)]
+    return args
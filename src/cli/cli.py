@@ -1,21 +1,106 @@
+import sqlite3
+import time
+
 import click
+from click.core import ParameterSource
 
 from src.core.analytics import (
-    get_habits,
-    get_habits_by_period,
+    get_due_habits,
+    get_group_stats,
     get_longest_streak_by_id,
-    get_streaks,
+    stream_habits,
+    stream_snapshot_streaks,
+    stream_stats,
+    stream_streaks,
+)
+from src.core.change_feed import iter_changes
+from src.core.clock import (
+    TZ_ENV_VAR,
+    FixedClock,
+    SystemClock,
+    get_clock,
+    set_clock,
 )
-from src.core.constants import PERIOD_DELTAS, get_today_date_string
+from src.core.constants import get_today_date_string
 from src.core.habit_tracker import HabitTracker
+from src.core.periodicity import get_cadence
+from src.infra.database import DB_ENV_VAR, configure_database
+from src.infra.date_utils import parse_duration
+from src.infra.event_log import rebuild_projections, replay_events, sweep_orphans
+from src.infra.initialization import init_app
+from src.infra.ordinal_snapshot import OrdinalSnapshot, export_ordinal_snapshot
+from src.infra.purge import PURGE_CHUNK_SIZE, purge_deleted_habits
+from src.infra.seeding import seed_habits
+from src.infra.write_batch import WriteBatch
+
+from .batch import parse_batch_line
+from .output import emit_one, emit_rows, format_option
 
 tracker = HabitTracker()
 
+# Commands that change connection settings or need to run outside a
+# transaction, so they always fail inside a batch's open transaction
+UNBATCHABLE_COMMANDS = {"seed", "compact"}
+
+PERIODICITY_HELP = (
+    "daily, weekly, biweekly, every:N, weekdays:mon,wed,..., calendar-weekly "
+    "or monthly"
+)
+
+
+def _cadence_spec(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return get_cadence(value).spec
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def _system_clock(ctx, param, value):
+    try:
+        return SystemClock(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
 
 @click.group()
-def cli():
+@click.option(
+    "--db",
+    envvar=DB_ENV_VAR,
+    help="Database file, ':memory:' or a SQLite URI (default: src/infra/habits.db)",
+)
+@click.option(
+    "--tz",
+    "clock",
+    envvar=TZ_ENV_VAR,
+    callback=_system_clock,
+    help="Time zone that decides what 'today' is, e.g. Europe/Berlin "
+    "(default: local time zone)",
+)
+@click.option(
+    "--today",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Act as if today were this date (YYYY-MM-DD), e.g. to backfill",
+)
+@click.pass_context
+def cli(ctx, db, clock, today):
     """Habit Tracker CLI"""
-    pass
+    if ctx.parent is not None:
+        # A line of a 'batch' script: the database is already set up and
+        # shared, and the batch's clock applies unless the line sets one
+        if ctx.get_parameter_source("db") is ParameterSource.COMMANDLINE:
+            raise click.UsageError("--db cannot be changed inside a batch.")
+        if today:
+            set_clock(FixedClock(today.date()))
+        elif ctx.get_parameter_source("clock") is ParameterSource.COMMANDLINE:
+            set_clock(clock)
+        return
+
+    set_clock(FixedClock(today.date()) if today else clock)
+    if db:
+        configure_database(db)
+    init_app()
 
 
 # -------------------------
@@ -26,45 +111,332 @@ def cli():
 @cli.command()
 @click.argument("name")
 @click.option("--description", default="", help="Optional description")
-@click.option("--periodicity", type=click.Choice(PERIOD_DELTAS.keys()), required=True)
 @click.option(
-    "--start-date", default=get_today_date_string(), help="Start date in YYYY-MM-DD"
+    "--periodicity", required=True, callback=_cadence_spec, help=PERIODICITY_HELP
+)
+@click.option(
+    "--start-date",
+    default=get_today_date_string,
+    show_default="today",
+    help="Start date in YYYY-MM-DD",
 )
-def create(name, description, periodicity, start_date):
+@click.option(
+    "--tag", "tags", multiple=True, help="Add the habit to a group (repeatable)"
+)
+@format_option
+def create(name, description, periodicity, start_date, tags, fmt):
     """Create a new habit"""
-    habit_id = tracker.create_habit(
-        {
-            "name": name,
-            "description": description,
-            "periodicity": periodicity,
-            "start_date": start_date,
-        }
-    )
-    click.echo(f"Habit created with ID {habit_id}")
+    try:
+        habit_id = tracker.create_habit(
+            {
+                "name": name,
+                "description": description,
+                "periodicity": periodicity,
+                "start_date": start_date,
+            },
+            list(tags),
+        )
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    emit_one({"id": habit_id}, fmt, f"Habit created with ID {habit_id}")
 
 
 @cli.command()
 @click.argument("habit_id", type=int)
-def delete(habit_id):
+@format_option
+def delete(habit_id, fmt):
     """Delete a habit by ID"""
     result = tracker.delete_habit(habit_id)
     if result:
-        click.echo("Habit deleted.")
+        emit_one({"id": habit_id, "deleted": True}, fmt, "Habit deleted.")
     else:
-        click.echo("Habit not found.")
+        click.echo("Habit not found.", err=True)
         raise click.Abort()
 
 
 @cli.command()
 @click.argument("habit_id", type=int)
-def complete(habit_id):
+@click.option(
+    "--date",
+    "completion_date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Record the completion for an earlier day (YYYY-MM-DD)",
+)
+@format_option
+def complete(habit_id, completion_date, fmt):
     """Complete a habit"""
     try:
-        completion_id = tracker.complete_habit(habit_id)
-        click.echo(f"Habit completed. Completion ID: {completion_id}")
+        completion_id = tracker.complete_habit(
+            habit_id, completion_date.date() if completion_date else None
+        )
+        emit_one(
+            {"habit_id": habit_id, "completion_id": completion_id},
+            fmt,
+            f"Habit completed. Completion ID: {completion_id}",
+        )
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.argument("habit_id", type=int)
+@click.option(
+    "--date",
+    "completion_date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=True,
+    help="Day of the completion to remove (YYYY-MM-DD)",
+)
+@format_option
+def uncomplete(habit_id, completion_date, fmt):
+    """Remove a mistaken completion"""
+    day = completion_date.date().isoformat()
+    try:
+        removed = tracker.uncomplete_habit(habit_id, completion_date.date())
     except ValueError as e:
-        click.echo(f"Error: {e}")
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    if not removed:
+        click.echo(f"No completion on {day}.", err=True)
         raise click.Abort()
+    emit_one(
+        {"habit_id": habit_id, "completion_date": day, "removed": True},
+        fmt,
+        f"Completion on {day} removed.",
+    )
+
+
+@cli.command()
+@click.argument("habit_id", type=int)
+@click.argument("tags", nargs=-1, required=True)
+@format_option
+def tag(habit_id, tags, fmt):
+    """Add a habit to one or more groups"""
+    try:
+        added = tracker.tag_habit(habit_id, list(tags))
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    emit_one(
+        {"habit_id": habit_id, "tags": list(tags), "added": added},
+        fmt,
+        f"Added {added} tag(s) to habit {habit_id}.",
+    )
+
+
+@cli.command()
+@click.argument("habit_id", type=int)
+@click.argument("tags", nargs=-1, required=True)
+@format_option
+def untag(habit_id, tags, fmt):
+    """Remove a habit from one or more groups"""
+    try:
+        removed = tracker.untag_habit(habit_id, list(tags))
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    emit_one(
+        {"habit_id": habit_id, "tags": list(tags), "removed": removed},
+        fmt,
+        f"Removed {removed} tag(s) from habit {habit_id}.",
+    )
+
+
+@cli.command()
+@click.option(
+    "--habits",
+    "habit_count",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+)
+@click.option(
+    "--years",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="History per habit",
+)
+@click.option(
+    "--miss-rate",
+    type=click.FloatRange(0, 1),
+    default=0.1,
+    show_default=True,
+    help="Probability of skipping a period",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@format_option
+def seed(habit_count, years, miss_rate, seed, fmt):
+    """Generate a reproducible synthetic dataset (for load testing)"""
+    start = time.perf_counter()
+    habits, completions = seed_habits(habit_count, years, miss_rate, seed)
+    elapsed = time.perf_counter() - start
+    emit_one(
+        {"habits": habits, "completions": completions, "seconds": elapsed},
+        fmt,
+        f"Seeded {habits} habits with {completions} completions in {elapsed:.2f}s.",
+    )
+
+
+@cli.command()
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Rebuild habits and completions from the event log first",
+)
+@format_option
+def compact(rebuild, fmt):
+    """Replay the event log, remove orphaned rows and checkpoint"""
+    seq = rebuild_projections() if rebuild else replay_events()
+    removed = sweep_orphans()
+    emit_one(
+        {"checkpoint": seq, "orphans_removed": removed},
+        fmt,
+        f"Projections checkpointed at event {seq}. "
+        f"Removed {removed} orphaned completions.",
+    )
+
+
+@cli.command()
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=PURGE_CHUNK_SIZE,
+    show_default=True,
+    help="Completions removed per transaction",
+)
+@click.option(
+    "--pause",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="Seconds to wait between chunks, to let other writers in",
+)
+@format_option
+def purge(chunk_size, pause, fmt):
+    """Remove deleted habits and their completions in small transactions"""
+
+    def report(habit_id, removed):
+        click.echo(f"Habit {habit_id}: {removed} completions removed", err=True)
+
+    habits, completions = purge_deleted_habits(chunk_size, pause, report)
+    emit_one(
+        {"habits": habits, "completions": completions},
+        fmt,
+        f"Purged {habits} deleted habits and {completions} completions.",
+    )
+
+
+@cli.command(name="export-snapshot")
+@click.argument("path", type=click.Path(dir_okay=False))
+@format_option
+def export_snapshot(path, fmt):
+    """Write a compact binary snapshot for fast, memory-mapped analytics"""
+    habits, completions = export_ordinal_snapshot(path)
+    emit_one(
+        {"path": path, "habits": habits, "completions": completions},
+        fmt,
+        f"Exported {habits} habits and {completions} completions to {path}.",
+    )
+
+
+@cli.command()
+@click.argument("script", type=click.File("r"), default="-")
+@click.option(
+    "--commit-every",
+    type=click.IntRange(min=1),
+    help="Commit after every N successful commands (default: once at the end)",
+)
+@click.option("--stop-on-error", is_flag=True, help="Stop at the first failing command")
+@format_option
+@click.pass_context
+def batch(ctx, script, commit_every, stop_on_error, fmt):
+    """Run commands from a file (or stdin) in one process and transaction.
+
+    Each line is a command in the usual syntax, e.g. `complete 3`, or JSON:
+    `["complete", "3"]` or `{"command": "complete", "habit_id": 3}`. Blank
+    lines and lines starting with # are skipped. A failing command is
+    rolled back on its own and reported on stderr with its line number.
+    seed and compact manage their own transactions and cannot be batched,
+    nor can --help.
+    --format sets the default output format of every command.
+    """
+    defaults = {name: {"fmt": fmt} for name in cli.commands}
+    clock = get_clock()
+    start = time.perf_counter()
+
+    ran = failed = 0
+
+    with WriteBatch(commit_every) as writes:
+        for line_number, line in enumerate(script, start=1):
+            try:
+                args = parse_batch_line(line, cli)
+                if args is None:
+                    continue
+                ran += 1
+                if args[:1] == ["batch"]:
+                    raise click.UsageError("Batches cannot be nested.")
+                if args[:1] and args[0] in UNBATCHABLE_COMMANDS:
+                    raise click.UsageError(f"'{args[0]}' cannot run inside a batch.")
+                if any(arg in ctx.help_option_names for arg in args):
+                    # Help text would land in the middle of the batch's output
+                    raise click.UsageError("--help cannot be used inside a batch.")
+                with writes.operation():
+                    _run_batch_line(ctx, args, defaults)
+            except click.Abort:
+                _batch_error(line_number, "aborted")
+            except click.ClickException as e:
+                _batch_error(line_number, e.format_message())
+            except click.exceptions.Exit as e:
+                # e.g. --help: nothing ran, but the line did not do its job
+                _batch_error(line_number, f"exited with status {e.exit_code}")
+            except (ValueError, sqlite3.Error) as e:
+                _batch_error(line_number, str(e))
+            except KeyboardInterrupt:
+                # Keep the commands that already succeeded and stop here
+                _batch_error(line_number, "interrupted")
+                failed += 1
+                break
+            except Exception as e:
+                _batch_error(line_number, f"{type(e).__name__}: {e}")
+            else:
+                continue
+            finally:
+                set_clock(clock)
+
+            failed += 1
+            if stop_on_error:
+                break
+
+    elapsed = time.perf_counter() - start
+    click.echo(
+        f"Ran {ran} commands ({failed} failed) in {elapsed:.2f}s"
+        f" ({ran / elapsed if elapsed else 0:,.0f}/s).",
+        err=True,
+    )
+    if failed:
+        ctx.exit(1)
+
+
+def _run_batch_line(ctx, args: list[str], defaults: dict) -> None:
+    command = cli.commands.get(args[0]) if args else None
+    if command is not None:
+        # No group options on this line, so skip parsing them (the slow part)
+        with command.make_context(
+            args[0], args[1:], parent=ctx, default_map=defaults[args[0]]
+        ) as line_ctx:
+            command.invoke(line_ctx)
+    else:
+        with cli.make_context(
+            ctx.find_root().info_name, args, parent=ctx, default_map=defaults
+        ) as line_ctx:
+            cli.invoke(line_ctx)
+
+
+def _batch_error(line_number: int, message: str) -> None:
+    click.echo(f"Line {line_number}: {message}", err=True)
 
 
 # -------------------------
@@ -75,34 +447,153 @@ def complete(habit_id):
 @cli.command(name="list")
 @click.option(
     "--period",
-    type=click.Choice(PERIOD_DELTAS.keys()),
-    help="Filter habits by periodicity",
+    callback=_cadence_spec,
+    help="Filter habits by periodicity spec",
 )
-def list_habits(period):
-    """List all habits, optionally filtered by periodicity."""
-    if period:
-        habits = get_habits_by_period(period)
-    else:
-        habits = get_habits()
-
-    if not habits:
-        click.echo("No habits found.")
-        return
-
-    for h in habits:
-        click.echo(f"[{h['id']}] {h['name']} ({h['periodicity']})")
+@click.option("--tag", help="Only habits in this group")
+@format_option
+def list_habits(period, tag, fmt):
+    """List all habits, optionally filtered by periodicity and tag."""
+    emit_rows(
+        stream_habits(period, tag),
+        fmt,
+        lambda h: f"[{h['id']}] {h['name']} ({h['periodicity']})",
+        empty_text="No habits found.",
+    )
 
 
 @cli.command()
 @click.argument("habit_id", type=int)
-def longest_streak(habit_id):
+@format_option
+def longest_streak(habit_id, fmt):
     """Get longest streak for a habit"""
     streak = get_longest_streak_by_id(habit_id)
-    click.echo(f"Longest streak for habit {habit_id}: {streak}")
+    emit_one(
+        {"id": habit_id, "longest_streak": streak},
+        fmt,
+        f"Longest streak for habit {habit_id}: {streak}",
+    )
 
 
 @cli.command()
-def streaks():
+@click.option(
+    "--snapshot",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Read from a file written by 'export-snapshot' instead of the database",
+)
+@format_option
+def streaks(snapshot, fmt):
     """Get current streaks for all habits"""
-    for entry in get_streaks():
-        click.echo(f"Habit {entry['id']} – Current Streak: {entry['streak']}")
+
+    def describe(entry):
+        return f"Habit {entry['id']} – Current Streak: {entry['streak']}"
+
+    if snapshot is None:
+        emit_rows(stream_streaks(), fmt, describe)
+        return
+    with OrdinalSnapshot(snapshot) as source:
+        emit_rows(stream_snapshot_streaks(source), fmt, describe)
+
+
+def _describe_stats(s) -> str:
+    gaps = (
+        f"gap mean {s['mean_gap']:.1f}d / median {s['median_gap']:g}d"
+        if s["mean_gap"] is not None
+        else "no gaps yet"
+    )
+    return (
+        f"[{s['id']}] {s['name']} ({s['periodicity']}): "
+        f"{s['completion_rate']:.0%} overall, {s['rolling_4_week_rate']:.0%} last 4 weeks, "
+        f"{gaps}, {s['breaks']} breaks, "
+        f"streak {s['current_streak']} (longest {s['longest_streak']})"
+    )
+
+
+@cli.command()
+@format_option
+def stats(fmt):
+    """Completion rate, gaps, breaks and streaks for all habits"""
+    emit_rows(stream_stats(), fmt, _describe_stats, empty_text="No habits found.")
+
+
+@cli.command()
+@click.argument("tag")
+@format_option
+def group_stats(tag, fmt):
+    """Completion rate and active streaks across a group of habits"""
+    stats = get_group_stats(tag)
+    emit_one(
+        stats,
+        fmt,
+        f"{tag}: {stats['habits']} habits, {stats['active_streaks']} on an "
+        f"active streak, {stats['completion_rate']:.0%} completion rate",
+    )
+
+
+def _duration_days(ctx, param, value):
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@cli.command()
+@click.option(
+    "--within",
+    default="1d",
+    callback=_duration_days,
+    help="Window starting today, e.g. 1d or 2w (default: 1d = due today)",
+)
+@click.option(
+    "--changed",
+    is_flag=True,
+    help="Only show habits not reported by a previous --changed run",
+)
+@format_option
+def due(within, changed, fmt):
+    """List habits whose streak breaks unless completed in time"""
+    emit_rows(
+        get_due_habits(within, changed_only=changed),
+        fmt,
+        lambda h: (
+            f"[{h['id']}] {h['name']} ({h['periodicity']}) – due {h['next_due_date']}"
+        ),
+        empty_text="No habits due.",
+    )
+
+
+def _describe_change(change) -> str:
+    if change["type"] == "habit_created":
+        return f"habit {change['habit_id']} created: {change['habit']['name']}"
+    if change["type"] in ("completed", "uncompleted"):
+        return (
+            f"habit {change['habit_id']} {change['type']} on "
+            f"{change['completion_date']} (completion {change['completion_id']})"
+        )
+    return f"habit {change['habit_id']} {change['type']}"
+
+
+@cli.command()
+@click.option(
+    "--since",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Only show changes after this sequence number",
+)
+@click.option("--follow", "-f", is_flag=True, help="Keep streaming new changes")
+@click.option(
+    "--interval",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Seconds between polls with --follow",
+)
+@format_option
+def changes(since, follow, interval, fmt):
+    """Show changes since a sequence number (for incremental consumers)"""
+    emit_rows(
+        iter_changes(since, follow=follow, poll_interval=interval),
+        fmt,
+        lambda change: f"[{change['seq']}] {_describe_change(change)}",
+    )
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from collections.abc import Callable, Iterable
+
+import click
+
+FORMATS = ["text", "json", "jsonl", "csv"]
+
+
+def format_option(func):
+    """Adds the --format option shared by every command."""
+    return click.option(
+        "--format",
+        "fmt",
+        type=click.Choice(FORMATS),
+        default="text",
+        show_default=True,
+        help="Output format; jsonl and csv are streamed row by row",
+    )(func)
+
+
+def _csv_value(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def emit_rows(
+    rows: Iterable[dict],
+    fmt: str,
+    text: Callable[[dict], str],
+    empty_text: str | None = None,
+) -> None:
+    """Writes rows as they arrive, so large results use constant memory.
+
+    Args:
+        rows (Iterable[dict]): Records to print, typically a generator over a
+            database cursor
+        fmt (str): One of FORMATS
+        text (Callable[[dict], str]): Formats one row for text output
+        empty_text (str | None): Printed in text mode when there are no rows
+    """
+    if fmt == "text":
+        empty = True
+        for row in rows:
+            empty = False
+            click.echo(text(row))
+        if empty and empty_text:
+            click.echo(empty_text)
+
+    elif fmt == "jsonl":
+        for row in rows:
+            click.echo(json.dumps(row))
+
+    elif fmt == "json":
+        # A JSON array, still written one element at a time
+        separator = ""
+        click.echo("[", nl=False)
+        for row in rows:
+            click.echo(separator + json.dumps(row), nl=False)
+            separator = ","
+        click.echo("]")
+
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow({k: _csv_value(v) for k, v in row.items()})
+            click.echo(buffer.getvalue(), nl=False)
+            buffer.seek(0)
+            buffer.truncate()
+
+
+def emit_one(record: dict, fmt: str, text: str) -> None:
+    """Writes the result of a command that produces a single record."""
+    if fmt == "text":
+        click.echo(text)
+    elif fmt == "json":
+        click.echo(json.dumps(record))
+    else:
+        emit_rows([record], fmt, lambda row: text)
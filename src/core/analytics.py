@@ -1,21 +1,237 @@
 import datetime
+import functools
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 
 from src.infra.database import (
-    query_completions_by_habit_id,
+    claim_changed_due_habits,
+    data_version,
+    is_read_routed,
+    iter_habit_completion_rows,
+    iter_habits,
+    iter_tag_member_totals,
+    query_completion_dates_by_habit_id,
+    query_due_habits,
     query_habit_by_id,
     query_habits,
     query_habits_by_period,
+    read_from,
 )
-from src.infra.date_utils import get_period_delta, parse_date
+from src.infra.date_utils import parse_ordinal, parse_ordinals
+from src.infra.ordinal_snapshot import OrdinalSnapshot
+from src.infra.replica import SnapshotReplica
+
+from .clock import get_clock
+from .model import (
+    DueHabitType,
+    GroupStatsType,
+    HabitStatsType,
+    HabitType,
+    Periodicity,
+)
+from .periodicity import Cadence, get_cadence
+
+_snapshot: SnapshotReplica | None = None
+
+# Results of the memoized functions below, valid for _cached_version only
+ANALYTICS_CACHE_SIZE = 256
+_cache: OrderedDict[tuple, object] = OrderedDict()
+_cached_version: tuple | None = None
+_cache_lock = threading.Lock()
+
+
+def use_snapshot(replica: SnapshotReplica | None) -> None:
+    """Routes analytics reads to a snapshot replica instead of the live database.
+
+    Args:
+        replica (SnapshotReplica | None): Replica to read from, or None to read
+            the live database again
+
+    Note:
+        The replica refreshes itself once it is older than its max_staleness,
+        so results lag the live database by at most that many seconds.
+    """
+    global _snapshot
+    _snapshot = replica
+    clear_cache()
+
+
+@contextmanager
+def _reading_snapshot() -> Iterator[None]:
+    """Routes reads in this context to the configured snapshot, if any."""
+    # Nested calls stay on the connection chosen by the outermost one
+    if _snapshot is None or is_read_routed():
+        yield
+    else:
+        with read_from(_snapshot.connection()):
+            yield
+
+
+def _snapshot_reads(func):
+    """Runs func against the configured snapshot, if any."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _reading_snapshot():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _snapshot_stream(func):
+    """Like _snapshot_reads, for generators.
+
+    Only the generator's own steps read from the snapshot; the caller's code
+    between items (which may write, or run the tracker's checks) still sees
+    the live database.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _snapshot is None or is_read_routed():
+            yield from func(*args, **kwargs)
+            return
+
+        # One connection for the whole stream, even if the replica refreshes
+        conn = _snapshot.connection()
+        items = func(*args, **kwargs)
+        while True:
+            with read_from(conn):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            yield item
+
+    return wrapper
+
+
+def clear_cache() -> None:
+    """Drops every memoized analytics result."""
+    global _cached_version
+    with _cache_lock:
+        _cache.clear()
+        _cached_version = None
+
+
+def _current_version() -> tuple:
+    if _snapshot is not None:
+        _snapshot.connection()  # Refreshes the snapshot if it is too stale
+        return ("snapshot", id(_snapshot), _snapshot.generation)
+    return ("live", *data_version())
+
+
+def _memoized(func):
+    """Caches func's results until the data it reads changes.
+
+    Results are keyed by (function, arguments, the default clock's date) and kept for as
+    long as the data version stays the same: PRAGMA data_version plus local
+    write counts for the live database, or the refresh generation of the
+    snapshot replica. A version change drops the whole cache. At most
+    ANALYTICS_CACHE_SIZE results are kept, least recently used first out.
+
+    Cached results are shared between callers and must not be mutated.
+    """
 
-from .model import HabitType, Periodicity
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _cached_version
+        # Explicitly routed reads may target any connection; don't cache them
+        if is_read_routed():
+            return func(*args, **kwargs)
+
+        version = _current_version()
+        key = (
+            func.__name__,
+            args,
+            tuple(sorted(kwargs.items())),
+            get_clock().today(),
+        )
+        with _cache_lock:
+            if version != _cached_version:
+                _cache.clear()
+                _cached_version = version
+            elif key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+        result = func(*args, **kwargs)
+
+        with _cache_lock:
+            if version == _cached_version:
+                _cache[key] = result
+                if len(_cache) > ANALYTICS_CACHE_SIZE:
+                    _cache.popitem(last=False)
+        return result
+
+    return wrapper
+
+
+def longest_streak(indexes: Sequence[int], step: int) -> int:
+    """Longest run of completions no more than step periods apart.
 
+    Args:
+        indexes (Sequence[int]): Period indexes of the completions, ascending
+            (day ordinals for rolling periodicities)
+        step (int): Maximum number of periods between consecutive completions
+
+    Returns:
+        int: Length of the longest run (0 if there are no completions)
+    """
+    if not indexes:
+        return 0
+
+    max_streak = 1
+    streak = 1
+    prev = indexes[0]
+
+    for curr in indexes[1:]:
+        if curr - prev <= step:
+            streak += 1
+            if streak > max_streak:
+                max_streak = streak
+        else:
+            streak = 1
+        prev = curr
+
+    return max_streak
+
+
+def current_streak(indexes: Sequence[int], step: int, today: int) -> int:
+    """Length of the run of completions that is still active today.
+
+    Args:
+        indexes (Sequence[int]): Period indexes of the completions, descending
+        step (int): Maximum number of periods between consecutive completions
+        today (int): Period index of today's date
+
+    Returns:
+        int: Length of the active run (0 if broken or no completions)
+    """
+    if not indexes or today - indexes[0] > step:
+        return 0
+
+    streak = 1
+    prev = indexes[0]
+
+    for curr in indexes[1:]:
+        if prev - curr > step:
+            break
+        streak += 1
+        prev = curr
+
+    return streak
 
+
+@_memoized
+@_snapshot_reads
 def get_habits_by_period(period: Periodicity) -> list[HabitType]:
     """Retrieves all habits with the specified periodicity.
 
     Args:
-        period (Periodicity): The periodicity to filter by ('daily', 'weekly', or 'biweekly')
+        period (Periodicity): The periodicity spec to filter by (e.g. 'daily')
 
     Returns:
         list[HabitType]: List of habits matching the periodicity, empty list if none found
@@ -23,6 +239,8 @@ def get_habits_by_period(period: Periodicity) -> list[HabitType]:
     return query_habits_by_period(period)
 
 
+@_memoized
+@_snapshot_reads
 def get_habits() -> list[HabitType]:
     """Retrieves all habits in the tracker.
 
@@ -32,6 +250,25 @@ def get_habits() -> list[HabitType]:
     return query_habits()
 
 
+@_snapshot_stream
+def stream_habits(
+    period: Periodicity | None = None, tag: str | None = None
+) -> Iterator[HabitType]:
+    """Streams habits one at a time, optionally filtered by periodicity and tag.
+
+    Args:
+        period (Periodicity | None): The periodicity to filter by, or None for all
+        tag (str | None): Only habits with this tag, or None for all
+
+    Yields:
+        HabitType: Habits straight from the database cursor, so memory use
+            does not grow with the number of habits
+    """
+    yield from iter_habits(period, tag)
+
+
+@_memoized
+@_snapshot_reads
 def get_longest_streak_by_id(habit_id: int) -> int:
     """Calculates the longest recorded streak for a specific habit.
 
@@ -43,35 +280,27 @@ def get_longest_streak_by_id(habit_id: int) -> int:
 
     Note:
         A streak is counted when habit is completed within its periodicity window
-        (e.g., within 7 days for weekly habits)
+        (e.g., within 7 days for weekly habits, or in consecutive calendar
+        months for monthly habits)
     """
     habit = query_habit_by_id(habit_id)
-    completions = query_completions_by_habit_id(habit_id)
-    if not habit or not completions:
+    if not habit:
         return 0
 
-    max_streak = 1
-    current_streak = 1
-    gap = get_period_delta(habit["periodicity"])
-
-    for i in range(1, len(completions)):
-        prev_date = parse_date(completions[i - 1]["completion_date"])
-        curr_date = parse_date(completions[i]["completion_date"])
-
-        if (curr_date - prev_date).days <= gap:
-            current_streak += 1
-            max_streak = max(max_streak, current_streak)
-        else:
-            current_streak = 1
-
-    return max_streak
+    cadence = get_cadence(habit["periodicity"])
+    ordinals = parse_ordinals(query_completion_dates_by_habit_id(habit_id))
+    return longest_streak(cadence.indexes(ordinals), cadence.step)
 
 
-def get_streak_by_habit_id(habit_id: int) -> int:
+@_memoized
+@_snapshot_reads
+def get_streak_by_habit_id(habit_id: int, today: datetime.date | None = None) -> int:
     """Calculates the current active streak for a habit.
 
     Args:
         habit_id (int): ID of the habit to check
+        today (datetime.date | None): Reference date, e.g. today in the
+            user's time zone (default: today according to the default clock)
 
     Returns:
         int: Current consecutive streak count (0 if broken or no completions)
@@ -81,40 +310,341 @@ def get_streak_by_habit_id(habit_id: int) -> int:
         periodicity window from today's date
     """
     habit = query_habit_by_id(habit_id)
-    completions = query_completions_by_habit_id(habit_id, "DESC")
-
-    if not habit or not completions:
+    if not habit:
         return 0
 
-    gap = get_period_delta(habit["periodicity"])
+    cadence = get_cadence(habit["periodicity"])
+    ordinals = parse_ordinals(query_completion_dates_by_habit_id(habit_id, "DESC"))
+    return current_streak(
+        cadence.indexes(ordinals),
+        cadence.step,
+        cadence.index((today or get_clock().today()).toordinal()),
+    )
 
-    latest_date = parse_date(completions[0]["completion_date"])
-    if (datetime.date.today() - latest_date).days > gap:
-        return 0
 
-    current_streak = 1
-    prev_date = latest_date
+@_snapshot_stream
+def stream_streaks(today: datetime.date | None = None) -> Iterator[dict]:
+    """Streams streak reports for all habits, one habit at a time.
 
-    for c in completions[1:]:
-        date = parse_date(c["completion_date"])
-        if (prev_date - date).days <= gap:
-            current_streak += 1
-            prev_date = date
-        else:
-            break
+    Args:
+        today (datetime.date | None): Reference date (default: today)
+
+    Yields:
+        dict: Dictionary containing:
+            - id (int): Habit ID
+            - streak (int): Current streak count
+    """
+    for item in iter_habits():
+        yield {
+            "id": item["id"],
+            "streak": get_streak_by_habit_id(item["id"], today),
+        }
 
-    return current_streak
 
+def stream_snapshot_streaks(
+    snapshot: OrdinalSnapshot, today: datetime.date | None = None
+) -> Iterator[dict]:
+    """Streams current and longest streaks for every habit in an ordinal snapshot.
+
+    Args:
+        snapshot (OrdinalSnapshot): Snapshot written by export_ordinal_snapshot
+        today (datetime.date | None): Reference date (default: today)
+
+    Yields:
+        dict: Dictionary containing:
+            - id (int): Habit ID
+            - streak (int): Current streak count
+            - longest_streak (int): Longest streak count
 
-def get_streaks() -> list[dict]:
+    Note:
+        For rolling periodicities the streak helpers walk the mapped
+        completion days directly, without copying or decoding them.
+    """
+    today_ordinal = (today or get_clock().today()).toordinal()
+    for habit_id, periodicity, ordinals in snapshot.entries():
+        cadence = get_cadence(periodicity)
+        indexes = cadence.indexes(ordinals)
+        yield {
+            "id": habit_id,
+            "streak": current_streak(
+                indexes[::-1], cadence.step, cadence.index(today_ordinal)
+            ),
+            "longest_streak": longest_streak(indexes, cadence.step),
+        }
+
+
+@_memoized
+@_snapshot_reads
+def get_streaks(today: datetime.date | None = None) -> list[dict]:
     """Generates streak reports for all habits.
 
+    Args:
+        today (datetime.date | None): Reference date (default: today)
+
     Returns:
         list[dict]: List of dictionaries containing:
             - id (int): Habit ID
             - streak (int): Current streak count
     """
-    return [
-        {"id": item["id"], "streak": get_streak_by_habit_id(item["id"])}
-        for item in get_habits()
-    ]
+    return list(stream_streaks(today))
+
+
+def get_due_habits(
+    within_days: int = 1,
+    changed_only: bool = False,
+    today: datetime.date | None = None,
+) -> list[DueHabitType]:
+    """Finds habits whose streak breaks unless they are completed soon.
+
+    Args:
+        within_days (int): Size of the window starting today; 1 means habits
+            that must be completed today
+        changed_only (bool): Only return habits whose due date changed since
+            the last changed_only call, and remember them as reported
+        today (datetime.date | None): First day of the window (default: today)
+
+    Returns:
+        list[DueHabitType]: Due habits ordered by due date
+
+    Note:
+        Uses the indexed next_due_date column, so the cost is proportional
+        to the number of due habits rather than to all habits and completions.
+    """
+    today = today or get_clock().today()
+    since = today.isoformat()
+    until = (today + datetime.timedelta(days=max(within_days, 1) - 1)).isoformat()
+
+    if changed_only:
+        return claim_changed_due_habits(since, until)
+    return query_due_habits(since, until)
+
+
+ROLLING_WINDOW_DAYS = 28
+
+
+def _periods_between(cadence: Cadence, first: int, last: int) -> int:
+    """Number of completions expected from day first to day last inclusive."""
+    if last < first:
+        return 0
+    span = cadence.index(last) - cadence.index(first)
+    return span // cadence.step + 1
+
+
+class _StatsAccumulator:
+    """Consistency metrics for one habit, fed its completions in date order.
+
+    Memory per habit is constant apart from the gap histogram, which only
+    grows with the number of distinct gap lengths.
+    """
+
+    __slots__ = (
+        "habit_id",
+        "name",
+        "periodicity",
+        "cadence",
+        "start",
+        "today",
+        "window_start",
+        "count",
+        "in_range",
+        "in_window",
+        "prev",
+        "prev_index",
+        "gap_total",
+        "gaps",
+        "breaks",
+        "streak",
+        "longest",
+    )
+
+    def __init__(
+        self, habit_id: int, name: str, periodicity: Periodicity, start: int, today: int
+    ) -> None:
+        self.habit_id = habit_id
+        self.name = name
+        self.periodicity = periodicity
+        self.cadence = get_cadence(periodicity)
+        self.start = start
+        self.today = today
+        # The rolling window never reaches back before the habit started
+        self.window_start = max(start, today - ROLLING_WINDOW_DAYS + 1)
+        self.count = 0
+        self.in_range = 0
+        self.in_window = 0
+        self.prev: int | None = None
+        self.prev_index: int | None = None
+        self.gap_total = 0
+        self.gaps: Counter[int] = Counter()
+        self.breaks = 0
+        self.streak = 0
+        self.longest = 0
+
+    def add(self, day: int) -> None:
+        self.count += 1
+        if self.start <= day <= self.today:
+            self.in_range += 1
+        if self.window_start <= day <= self.today:
+            self.in_window += 1
+
+        index = self.cadence.index(day)
+        if self.prev is None or self.prev_index is None:
+            self.streak = 1
+        else:
+            days = day - self.prev
+            self.gap_total += days
+            self.gaps[days] += 1
+            if index - self.prev_index <= self.cadence.step:
+                self.streak += 1
+            else:
+                self.breaks += 1
+                self.streak = 1
+        self.longest = max(self.longest, self.streak)
+        self.prev = day
+        self.prev_index = index
+
+    def result(self) -> HabitStatsType:
+        expected = _periods_between(self.cadence, self.start, self.today)
+        window_periods = _periods_between(self.cadence, self.window_start, self.today)
+        gap_count = self.count - 1 if self.count else 0
+        today_index = self.cadence.index(self.today)
+        active = (
+            self.prev_index is not None
+            and today_index - self.prev_index <= self.cadence.step
+        )
+
+        return {
+            "id": self.habit_id,
+            "name": self.name,
+            "periodicity": self.periodicity,
+            "completions": self.count,
+            "completion_rate": min(self.in_range / expected, 1.0) if expected else 0.0,
+            "rolling_4_week_rate": (
+                min(self.in_window / window_periods, 1.0) if window_periods else 0.0
+            ),
+            "mean_gap": self.gap_total / gap_count if gap_count else None,
+            "median_gap": _histogram_median(self.gaps, gap_count),
+            "breaks": self.breaks,
+            "current_streak": self.streak if active else 0,
+            "longest_streak": self.longest,
+        }
+
+
+def _histogram_median(histogram: Counter[int], total: int) -> float | None:
+    if not total:
+        return None
+
+    # Values at the two middle positions (the same one when total is odd)
+    lower_pos, upper_pos = (total - 1) // 2, total // 2
+    lower = upper = None
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if lower is None and seen > lower_pos:
+            lower = value
+        if seen > upper_pos:
+            upper = value
+            break
+
+    assert lower is not None and upper is not None
+    return (lower + upper) / 2
+
+
+@_snapshot_stream
+def stream_stats(today: datetime.date | None = None) -> Iterator[HabitStatsType]:
+    """Streams consistency metrics for every habit from one ordered scan.
+
+    Args:
+        today (datetime.date | None): Reference date (default: today)
+
+    Yields:
+        HabitStatsType: Per habit, in ID order:
+            - completion_rate: share of periods since start_date with a completion
+            - rolling_4_week_rate: the same over the last 4 weeks
+            - mean_gap / median_gap: days between consecutive completions
+            - breaks: gaps longer than the habit's periodicity
+            - current_streak / longest_streak: as in the streak functions
+
+    Note:
+        All metrics are computed together while walking a single query over
+        all habits and completions, instead of one query per habit and metric.
+    """
+    today_ordinal = (today or get_clock().today()).toordinal()
+    acc: _StatsAccumulator | None = None
+
+    for (
+        habit_id,
+        name,
+        periodicity,
+        start_date,
+        completion_date,
+    ) in iter_habit_completion_rows():
+        if acc is None or acc.habit_id != habit_id:
+            if acc is not None:
+                yield acc.result()
+            acc = _StatsAccumulator(
+                habit_id,
+                name,
+                periodicity,
+                parse_ordinal(start_date),
+                today_ordinal,
+            )
+        if completion_date is not None:
+            acc.add(parse_ordinal(completion_date))
+
+    if acc is not None:
+        yield acc.result()
+
+
+@_memoized
+def get_stats(today: datetime.date | None = None) -> list[HabitStatsType]:
+    """Computes consistency metrics for every habit.
+
+    Returns:
+        list[HabitStatsType]: See stream_stats
+    """
+    return list(stream_stats(today))
+
+
+@_memoized
+@_snapshot_reads
+def get_group_stats(tag: str, today: datetime.date | None = None) -> GroupStatsType:
+    """Aggregates consistency metrics over every habit with a tag.
+
+    Args:
+        tag (str): The tag whose habits are aggregated
+        today (datetime.date | None): Day to measure up to (default: today)
+
+    Returns:
+        GroupStatsType: Totals for the group:
+            - habits: number of habits with the tag
+            - active_streaks: habits whose current streak is still alive
+            - completions: completions counted towards completion_rate
+            - completion_rate: share of all the members' periods since their
+              start dates that have a completion, as in get_stats
+
+    Note:
+        One indexed join-and-aggregate query returns a single row of totals
+        per member, so no completions are loaded and no per-habit queries run.
+    """
+    today = today or get_clock().today()
+    today_ordinal = today.toordinal()
+    habits = active = completed = expected = 0
+
+    for periodicity, start_date, is_active, completions in iter_tag_member_totals(
+        tag, today.isoformat()
+    ):
+        periods = _periods_between(
+            get_cadence(periodicity), parse_ordinal(start_date), today_ordinal
+        )
+        habits += 1
+        active += is_active
+        completed += min(completions, periods)
+        expected += periods
+
+    return {
+        "tag": tag,
+        "habits": habits,
+        "active_streaks": active,
+        "completions": completed,
+        "completion_rate": completed / expected if expected else 0.0,
+    }
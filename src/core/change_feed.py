@@ -0,0 +1,56 @@
+import time
+from collections.abc import Iterator
+
+from src.infra.database import query_changes_since
+
+from .model import ChangeType
+
+
+def get_changes(since: int = 0, limit: int = 1000) -> list[ChangeType]:
+    """Retrieves changes committed after a cursor.
+
+    Args:
+        since (int): Sequence number of the last change already processed
+            (0 for everything)
+        limit (int): Maximum number of changes to return
+
+    Returns:
+        list[ChangeType]: Changes in commit order; pass the last seq back in
+            as since to continue
+    """
+    return query_changes_since(since, limit)
+
+
+def iter_changes(
+    since: int = 0,
+    follow: bool = False,
+    poll_interval: float = 1.0,
+    batch_size: int = 1000,
+) -> Iterator[ChangeType]:
+    """Streams changes committed after a cursor.
+
+    Args:
+        since (int): Sequence number of the last change already processed
+        follow (bool): Keep waiting for new changes instead of stopping once
+            caught up
+        poll_interval (float): Seconds between checks for new changes when
+            following
+        batch_size (int): Changes fetched per query
+
+    Yields:
+        ChangeType: Changes in commit order
+
+    Note:
+        Each poll is a range scan on the event log's primary key, so
+        consumers only pay for the changes they have not seen yet.
+    """
+    while True:
+        changes = query_changes_since(since, batch_size)
+        yield from changes
+        if changes:
+            since = changes[-1]["seq"]
+        if len(changes) == batch_size:
+            continue
+        if not follow:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,75 @@
+import datetime
+from typing import Protocol
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+TZ_ENV_VAR = "HABIT_TZ"
+
+
+class Clock(Protocol):
+    """Source of "today" for completions and streak calculations."""
+
+    def today(self) -> datetime.date: ...
+
+
+class SystemClock:
+    """The current date, optionally in a specific time zone."""
+
+    def __init__(self, tz: str | datetime.tzinfo | None = None) -> None:
+        """
+        Args:
+            tz (str | datetime.tzinfo | None): IANA zone name (e.g.
+                "Europe/Berlin") or tzinfo; None uses the local time zone
+
+        Raises:
+            ValueError: If the zone name is unknown
+        """
+        if isinstance(tz, str):
+            try:
+                tz = ZoneInfo(tz)
+            except (ZoneInfoNotFoundError, ValueError) as e:
+                raise ValueError(f"Unknown time zone {tz!r}.") from e
+        self.tz = tz
+
+    def today(self) -> datetime.date:
+        if self.tz is None:
+            return datetime.date.today()
+        return datetime.datetime.now(self.tz).date()
+
+
+class FixedClock:
+    """A clock that stays on one day until moved, for replays and tests."""
+
+    def __init__(self, day: datetime.date | str) -> None:
+        self.set(day)
+
+    def today(self) -> datetime.date:
+        return self.day
+
+    def set(self, day: datetime.date | str) -> None:
+        if isinstance(day, str):
+            day = datetime.date.fromisoformat(day)
+        self.day = day
+
+    def advance(self, days: int = 1) -> datetime.date:
+        """Moves the clock forward (or back, for negative days) and returns the new day."""
+        self.day += datetime.timedelta(days=days)
+        return self.day
+
+
+_clock: Clock = SystemClock()
+
+
+def get_clock() -> Clock:
+    """The process-wide default clock."""
+    return _clock
+
+
+def set_clock(clock: Clock | None) -> None:
+    """Replaces the process-wide default clock (None restores the system clock)."""
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
+
+
+def today() -> datetime.date:
+    """Today's date according to the default clock."""
+    return _clock.today()
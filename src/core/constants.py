@@ -1,28 +1,28 @@
-from datetime import date
+from .clock import today
 
 
 def get_today_date_string() -> str:
-    return date.today().isoformat()
-
-
-# predefined habits (at least 1 daily, 1 weekly)
-initial_habits = [
-    (
-        "Drink Water",
-        "Stay hydrated by drinking 8 glasses",
-        "daily",
-        get_today_date_string(),
-    ),
-    (
-        "Exercise",
-        "Do 20 minutes of physical activity",
-        "daily",
-        get_today_date_string(),
-    ),
-    ("Read Book", "Read 10 pages of a book", "daily", get_today_date_string()),
-    ("Call Parents", "Weekly call family", "weekly", get_today_date_string()),
-    ("Clean Room", "Tidy and organize living space", "weekly", get_today_date_string()),
-]
+    return today().isoformat()
+
+
+def get_initial_habits() -> list[tuple[str, str, str, str]]:
+    """Predefined habits (at least 1 daily, 1 weekly), starting today.
+
+    Built on demand rather than at import time, so the start date follows
+    the clock in effect when the database is seeded.
+
+    Returns:
+        list[tuple[str, str, str, str]]: Name, description, periodicity and
+            start date of each habit
+    """
+    start_date = get_today_date_string()
+    return [
+        ("Drink Water", "Stay hydrated by drinking 8 glasses", "daily", start_date),
+        ("Exercise", "Do 20 minutes of physical activity", "daily", start_date),
+        ("Read Book", "Read 10 pages of a book", "daily", start_date),
+        ("Call Parents", "Weekly call family", "weekly", start_date),
+        ("Clean Room", "Tidy and organize living space", "weekly", start_date),
+    ]
 
 
 PERIOD_DELTAS = {
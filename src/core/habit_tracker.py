@@ -1,37 +1,71 @@
 import datetime
 
-from src.core.model import CreateHabitBody
+from src.core.clock import Clock, get_clock
+from src.core.model import CreateCompletionBody, CreateHabitBody
+from src.core.periodicity import get_cadence
 from src.infra.database import (
     add_completion,
     add_habit,
+    add_habit_tags,
+    delete_completions_on_date,
     delete_habit_by_id,
+    query_adjacent_completion_dates,
     query_habit_by_id,
-    query_latest_completion_by_habit_id,
+    remove_habit_tags,
 )
-from src.infra.date_utils import get_period_delta, parse_date
+from src.infra.date_utils import parse_ordinal
+from src.infra.write_buffer import CompletionWriteBuffer
 
 
 class HabitTracker:
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        write_buffer: CompletionWriteBuffer | None = None,
+        clock: Clock | None = None,
+    ) -> None:
+        """
+        Args:
+            write_buffer (CompletionWriteBuffer | None): When given, completions
+                are queued and group-committed in the background instead of
+                being written one commit at a time
+            clock (Clock | None): Decides which day completions are recorded
+                for, e.g. a SystemClock in the user's time zone or a FixedClock
+                when replaying past days; defaults to the process-wide clock
+        """
+        self.write_buffer = write_buffer
+        self.clock = clock
 
-    def create_habit(self, habit: CreateHabitBody) -> int | None:
+    def today(self) -> datetime.date:
+        """Today's date according to this tracker's clock."""
+        return (self.clock or get_clock()).today()
+
+    def create_habit(
+        self, habit: CreateHabitBody, tags: list[str] | None = None
+    ) -> int | None:
         """Creates and stores a new habit in the tracker.
 
         Args:
             habit (CreateHabitBody): Dictionary containing habit details including:
                 - name: str
-                - periodicity: str (daily/weekly/biweekly)
+                - periodicity: str (a periodicity spec, see get_cadence)
                 - description: Optional[str]
                 - creation_date: str (ISO format)
+            tags (list[str] | None): Groups to add the habit to, stored in the
+                same transaction as the habit
 
         Returns:
             int | None: ID of the newly created habit, or None if creation failed
+
+        Raises:
+            ValueError: If the periodicity is not a supported spec or a tag
+                is blank; nothing is stored then
         """
-        return add_habit(habit)
+        periodicity = get_cadence(habit["periodicity"]).spec
+        cleaned = _clean_tags(tags) if tags else None
+        return add_habit({**habit, "periodicity": periodicity}, cleaned)
 
     def delete_habit(self, id: int) -> bool:
-        """Permanently removes a habit from the tracker.
+        """Removes a habit from the tracker.
 
         Args:
             id (int): The ID of the habit to delete
@@ -40,44 +74,138 @@ class HabitTracker:
             bool: True if habit was found and deleted, False otherwise
 
         Note:
-            This will also delete all completion records associated with the habit.
+            The habit is hidden at once and its completion records are
+            removed later by purge_deleted_habits, so this returns immediately
+            however long the habit's history is.
         """
         return delete_habit_by_id(id)
 
-    def complete_habit(self, id: int) -> int | None:
+    def tag_habit(self, id: int, tags: list[str]) -> int:
+        """Adds a habit to one or more groups.
+
+        Args:
+            id (int): The ID of the habit
+            tags (list[str]): Tags to add; ones the habit already has are ignored
+
+        Returns:
+            int: Number of tags that were added
+
+        Raises:
+            ValueError: If no habit exists with the given ID or a tag is blank
+        """
+        tags = _clean_tags(tags)
+        if query_habit_by_id(id) is None:
+            raise ValueError(f"Habit with id {id} not found.")
+        return add_habit_tags(id, tags)
+
+    def untag_habit(self, id: int, tags: list[str]) -> int:
+        """Removes a habit from one or more groups.
+
+        Args:
+            id (int): The ID of the habit
+            tags (list[str]): Tags to remove
+
+        Returns:
+            int: Number of tags the habit had and no longer has
+        """
+        return remove_habit_tags(id, _clean_tags(tags))
+
+    def complete_habit(
+        self, id: int, completion_date: datetime.date | None = None
+    ) -> int | None:
         """Records a completion of the specified habit.
 
         Args:
             id (int): The ID of the habit to complete
+            completion_date (datetime.date | None): Day the habit was done, for
+                backdated completions (default: today)
 
         Returns:
-            int | None: ID of the new completion record, or None if failed
+            int | None: ID of the new completion record, or None if failed or
+                the completion was queued on the write buffer
 
         Raises:
             ValueError: If either:
                 - No habit exists with the given ID
-                - Habit was already completed in current period
+                - The date is in the future
+                - Habit was already completed in the same period
 
         Note:
-            Completion is only allowed once per period (day/week/biweek).
+            Completion is only allowed once per period (day/week/biweek). The
+            rule is checked against the nearest completions before and after
+            the date, two indexed lookups however long the history is.
         """
         habit = query_habit_by_id(id)
 
         if habit is None:
             raise ValueError(f"Habit with id {id} not found.")
 
-        today = datetime.date.today()
-        latest_completion = query_latest_completion_by_habit_id(id)
-
-        if latest_completion:
-            last_date = parse_date(latest_completion["completion_date"])
-            period_delta = get_period_delta(habit["periodicity"])
-            if (today - last_date).days < period_delta:
+        today = self.today()
+        day = completion_date or today
+        if day > today:
+            raise ValueError("Cannot complete a habit in the future.")
+
+        date_string = day.isoformat()
+
+        # Completions still waiting in the write buffer count as well. Only
+        # the latest queued date is tracked, which is the nearest queued
+        # neighbour unless this completion is backdated before it; in that
+        # case the queue lands first so the database has every neighbour.
+        pending_date = None
+        if self.write_buffer is not None:
+            pending_date = self.write_buffer.latest_pending_date(id)
+            if pending_date is not None and pending_date > date_string:
+                self.write_buffer.flush()
+                pending_date = None
+
+        before, after = query_adjacent_completion_dates(id, date_string)
+        if pending_date is not None:
+            before = max(before or pending_date, pending_date)
+
+        cadence = get_cadence(habit["periodicity"])
+        index = cadence.index(day.toordinal())
+        for neighbour in [before, after]:
+            if neighbour is None:
+                continue
+            if abs(index - cadence.index(parse_ordinal(neighbour))) < cadence.step:
                 raise ValueError("Cannot complete habit twice in the same period.")
 
-        return add_completion(
-            {
-                "completion_date": today.isoformat(),
-                "habit_id": habit["id"],
-            }
-        )
+        completion: CreateCompletionBody = {
+            "completion_date": date_string,
+            "habit_id": habit["id"],
+        }
+
+        if self.write_buffer is not None:
+            self.write_buffer.enqueue(completion)
+            return None
+
+        return add_completion(completion)
+
+    def uncomplete_habit(self, id: int, completion_date: datetime.date) -> bool:
+        """Removes a habit's completion on the given day.
+
+        Args:
+            id (int): The ID of the habit
+            completion_date (datetime.date): Day of the completion to remove
+
+        Returns:
+            bool: True if a completion was removed, False if there was none
+
+        Raises:
+            ValueError: If no habit exists with the given ID
+        """
+        if query_habit_by_id(id) is None:
+            raise ValueError(f"Habit with id {id} not found.")
+
+        # A queued completion for that day must land before it can be removed
+        if self.write_buffer is not None:
+            self.write_buffer.flush()
+
+        return delete_completions_on_date(id, completion_date.isoformat()) > 0
+
+
+def _clean_tags(tags: list[str]) -> list[str]:
+    cleaned = [tag.strip() for tag in tags]
+    if not all(cleaned):
+        raise ValueError("Tags cannot be blank.")
+    return list(dict.fromkeys(cleaned))
@@ -1,7 +1,10 @@
 from typing import Literal, NotRequired, TypedDict
 
-Periodicity = Literal["daily", "weekly", "biweekly"]
+# A cadence spec such as "daily", "every:3" or "weekdays:mon,thu"
+# (see src.core.periodicity.get_cadence)
+Periodicity = str
 SortOrder = Literal["ASC", "DESC"]
+EventType = Literal["habit_created", "completed", "uncompleted", "deleted"]
 
 
 class HabitType(TypedDict):
@@ -28,3 +31,42 @@ class CompletionType(TypedDict):
 class CreateCompletionBody(TypedDict):
     habit_id: int
     completion_date: str
+
+
+class DueHabitType(TypedDict):
+    id: int
+    name: str
+    periodicity: Periodicity
+    next_due_date: str
+
+
+class ChangeType(TypedDict):
+    seq: int
+    type: EventType
+    habit_id: int
+    completion_id: int | None
+    completion_date: str | None
+    habit: dict | None
+    recorded_at: str
+
+
+class HabitStatsType(TypedDict):
+    id: int
+    name: str
+    periodicity: Periodicity
+    completions: int
+    completion_rate: float
+    rolling_4_week_rate: float
+    mean_gap: float | None
+    median_gap: float | None
+    breaks: int
+    current_streak: int
+    longest_streak: int
+
+
+class GroupStatsType(TypedDict):
+    tag: str
+    habits: int
+    active_streaks: int
+    completions: int
+    completion_rate: float
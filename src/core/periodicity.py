@@ -0,0 +1,146 @@
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from datetime import date
+from functools import lru_cache
+
+from .constants import PERIOD_DELTAS
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# date.fromordinal(1) is Monday 0001-01-01, so (ordinal - 1) // 7 numbers
+# calendar weeks starting on Monday
+_FIRST_MONDAY = 1
+
+
+class Cadence(ABC):
+    """Maps dates (as day ordinals) to integer period indexes.
+
+    Two completions are part of the same streak when their period indexes are
+    at most `step` apart, and a habit can be completed again once the index
+    has moved at least `step` past the latest completion. Subclasses must
+    implement index() and start_of().
+    """
+
+    spec: str
+    step: int = 1
+
+    @abstractmethod
+    def index(self, ordinal: int) -> int:
+        """Period index of the given day (ordinal)."""
+
+    @abstractmethod
+    def start_of(self, index: int) -> int:
+        """First day (ordinal) of the period with the given index."""
+
+    def indexes(self, ordinals: Sequence[int]) -> Sequence[int]:
+        """Period indexes for a whole column of day ordinals."""
+        return list(map(self.index, ordinals))
+
+    def deadline(self, last_index: int) -> int:
+        """Last day (ordinal) a completion keeps a streak ending at last_index alive."""
+        return self.start_of(last_index + self.step + 1) - 1
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.spec!r})"
+
+
+class RollingCadence(Cadence):
+    """At most `days` days between completions (daily, weekly, every:N)."""
+
+    def __init__(self, spec: str, days: int) -> None:
+        self.spec = spec
+        self.step = days
+
+    def index(self, ordinal: int) -> int:
+        return ordinal
+
+    def start_of(self, index: int) -> int:
+        return index
+
+    def indexes(self, ordinals: Sequence[int]) -> Sequence[int]:
+        # Indexes are the ordinals themselves
+        return ordinals
+
+
+class CalendarWeekCadence(Cadence):
+    """Once per Monday-to-Sunday calendar week."""
+
+    spec = "calendar-weekly"
+
+    def index(self, ordinal: int) -> int:
+        return (ordinal - _FIRST_MONDAY) // 7
+
+    def start_of(self, index: int) -> int:
+        return index * 7 + _FIRST_MONDAY
+
+
+class MonthlyCadence(Cadence):
+    """Once per calendar month."""
+
+    spec = "monthly"
+
+    def index(self, ordinal: int) -> int:
+        d = date.fromordinal(ordinal)
+        return d.year * 12 + d.month - 1
+
+    def start_of(self, index: int) -> int:
+        year, month = divmod(index, 12)
+        return date(year, month + 1, 1).toordinal()
+
+
+class WeekdaysCadence(Cadence):
+    """On specific weekdays; each period runs from one scheduled day to the next."""
+
+    def __init__(self, weekdays: Sequence[int]) -> None:
+        self.weekdays = sorted(set(weekdays))
+        self.spec = "weekdays:" + ",".join(WEEKDAYS[d] for d in self.weekdays)
+        self._per_week = len(self.weekdays)
+        # Boundary table: for each weekday, the slot of the latest scheduled
+        # day on or before it (-1 means it belongs to last week's final slot)
+        self._slot = [
+            sum(1 for d in self.weekdays if d <= weekday) - 1 for weekday in range(7)
+        ]
+
+    def index(self, ordinal: int) -> int:
+        week, weekday = divmod(ordinal - _FIRST_MONDAY, 7)
+        return week * self._per_week + self._slot[weekday]
+
+    def start_of(self, index: int) -> int:
+        week, slot = divmod(index, self._per_week)
+        return week * 7 + _FIRST_MONDAY + self.weekdays[slot]
+
+
+@lru_cache(maxsize=None)
+def get_cadence(spec: str) -> Cadence:
+    """Parses a periodicity spec.
+
+    Supported specs:
+        - daily, weekly, biweekly: rolling windows of 1, 7 or 14 days
+        - every:N: rolling window of N days
+        - weekdays:mon,wed,fri: on the given weekdays
+        - calendar-weekly: once per Monday-to-Sunday week
+        - monthly: once per calendar month
+
+    Raises:
+        ValueError: If the spec is not recognised
+    """
+    spec = spec.strip().lower()
+    kind, _, arg = spec.partition(":")
+
+    if spec in PERIOD_DELTAS:
+        return RollingCadence(spec, PERIOD_DELTAS[spec])
+    if kind == "every" and arg.isdigit() and int(arg) > 0:
+        return RollingCadence(f"every:{int(arg)}", int(arg))
+    if spec == CalendarWeekCadence.spec:
+        return CalendarWeekCadence()
+    if spec == MonthlyCadence.spec:
+        return MonthlyCadence()
+    if kind == "weekdays" and arg:
+        names = [name.strip() for name in arg.split(",")]
+        if all(name in WEEKDAYS for name in names):
+            return WeekdaysCadence([WEEKDAYS.index(name) for name in names])
+
+    raise ValueError(
+        f"Unknown periodicity {spec!r}. Use daily, weekly, biweekly, every:N, "
+        "weekdays:mon,wed,..., calendar-weekly or monthly."
+    )
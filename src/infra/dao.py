@@ -0,0 +1,43 @@
+import sqlite3
+
+from src.core.model import CompletionType, HabitType, SortOrder
+from src.infra import database
+from src.infra import queries as q
+from src.infra.database import parse_completion_row, parse_habit_row
+
+
+class HabitDAO:
+    """Runs the hot read queries on one connection and one reused cursor.
+
+    The module-level query functions open a connection per call, which also
+    throws away SQLite's prepared statements. Code that issues the same
+    queries thousands of times in one process should hold a HabitDAO instead.
+    """
+
+    def __init__(self, conn: sqlite3.Connection | None = None) -> None:
+        self.conn = conn if conn is not None else database.get_connection()
+        self._cursor = self.conn.cursor()
+
+    def habit_by_id(self, habit_id: int) -> HabitType | None:
+        row = self._cursor.execute(q.SELECT_HABIT_BY_ID, (habit_id,)).fetchone()
+        return parse_habit_row(row) if row else None
+
+    def habits(self) -> list[HabitType]:
+        return [parse_habit_row(row) for row in self._cursor.execute(q.SELECT_HABITS)]
+
+    def completions_by_habit_id(
+        self, habit_id: int, order: SortOrder = "ASC"
+    ) -> list[CompletionType]:
+        sql = q.SELECT_COMPLETIONS_BY_HABIT_ID[order]
+        return [
+            parse_completion_row(row) for row in self._cursor.execute(sql, (habit_id,))
+        ]
+
+    def latest_completion_by_habit_id(self, habit_id: int) -> CompletionType | None:
+        row = self._cursor.execute(
+            q.SELECT_LATEST_COMPLETION_BY_HABIT_ID, (habit_id,)
+        ).fetchone()
+        return parse_completion_row(row) if row else None
+
+    def close(self) -> None:
+        self._cursor.close()
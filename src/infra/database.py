@@ -1,19 +1,46 @@
+import json
+import os
 import sqlite3
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date, timedelta
+from itertools import chain
 from pathlib import Path
 
 from src.core.model import (
+    ChangeType,
     CompletionType,
     CreateCompletionBody,
     CreateHabitBody,
+    DueHabitType,
     HabitType,
     Periodicity,
     SortOrder,
 )
-from src.infra.date_utils import get_period_delta
+from src.infra import queries as q
+from src.infra.date_utils import get_next_due_date, get_period_delta
 
 DB_DIR = Path(__file__).parent
-DB_PATH = DB_DIR / "habits.db"
+DB_ENV_VAR = "HABIT_DB"
+DB_PATH: str | Path = os.environ.get(DB_ENV_VAR) or DB_DIR / "habits.db"
+
+# In-memory databases live as long as their connection, so one is held open
+_held_connection: sqlite3.Connection | None = None
+
+# Long-lived connection used only to watch PRAGMA data_version, and a counter
+# bumped whenever the database layer is pointed somewhere else
+_version_connection: sqlite3.Connection | None = None
+_configuration = 0
+
+# Connection shared by every read and write while deferred_commits() is active
+_deferred: "_DeferredCommitConnection | None" = None
+
+# Connection that read queries use instead of the live database, if any
+_read_connection: ContextVar[sqlite3.Connection | None] = ContextVar(
+    "read_connection", default=None
+)
 
 
 def parse_habit_row(row: tuple) -> HabitType:
@@ -26,41 +53,306 @@ def parse_habit_row(row: tuple) -> HabitType:
     }
 
 
+def parse_completion_row(row: tuple) -> CompletionType:
+    return {"id": row[0], "habit_id": row[1], "completion_date": row[2]}
+
+
+def parse_change_row(row: tuple) -> ChangeType:
+    return {
+        "seq": row[0],
+        "type": row[1],
+        "habit_id": row[2],
+        "completion_id": row[3],
+        "completion_date": row[4],
+        "habit": json.loads(row[5]) if row[5] else None,
+        "recorded_at": row[6],
+    }
+
+
+def parse_due_habit_row(row: tuple) -> DueHabitType:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "periodicity": row[2],
+        "next_due_date": row[3],
+    }
+
+
+def is_memory_database(path: str | Path) -> bool:
+    """Whether path is ":memory:" or a SQLite URI with mode=memory."""
+    path = str(path)
+    return path == ":memory:" or (path.startswith("file:") and "mode=memory" in path)
+
+
+def uses_memory_database() -> bool:
+    """Whether the configured database lives in memory, on one held connection."""
+    return is_memory_database(DB_PATH)
+
+
+def configure_database(path: str | Path | None = None) -> None:
+    """Point the database layer at a file, ":memory:" or a SQLite URI.
+
+    Without a path, falls back to the HABIT_DB environment variable and then
+    to the default file. In-memory databases keep a single connection open
+    for the rest of the process (or until pointed somewhere else).
+    """
+    global DB_PATH, _held_connection, _version_connection, _configuration
+
+    path = path or os.environ.get(DB_ENV_VAR) or DB_DIR / "habits.db"
+    if path == DB_PATH and _held_connection is not None:
+        return
+
+    if _held_connection is not None:
+        _held_connection.close()
+        _held_connection = None
+    if _version_connection is not None:
+        _version_connection.close()
+        _version_connection = None
+
+    DB_PATH = path
+    _configuration += 1
+
+    if is_memory_database(DB_PATH):
+        _held_connection = _connect(DB_PATH, check_same_thread=False)
+
+
+def _connect(path: str | Path, **kwargs) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        uri=str(path).startswith("file:"),
+        cached_statements=q.CACHED_STATEMENTS,
+        **kwargs,
+    )
+    conn.execute(q.ENABLE_FOREIGN_KEYS)
+    return conn
+
+
+class _DeferredCommitConnection:
+    """Wraps a connection so that commit() and rollback() do nothing.
+
+    The write functions commit (or roll back, via the connection's context
+    manager) after every call; wrapped, their work stays in the caller's
+    transaction instead.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __enter__(self) -> "_DeferredCommitConnection":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+@contextmanager
+def deferred_commits() -> Iterator[sqlite3.Connection]:
+    """Runs every read and write in this context on one shared connection.
+
+    The database functions' own commits are suppressed, so their writes
+    accumulate in one transaction; commit or roll back through the yielded
+    connection. Whatever is still uncommitted when the context exits is
+    rolled back.
+    """
+    global _deferred
+
+    if _deferred is not None:
+        raise RuntimeError("deferred_commits() cannot be nested.")
+
+    conn = get_connection()
+    _deferred = _DeferredCommitConnection(conn)
+    try:
+        yield conn
+    finally:
+        _deferred = None
+        conn.rollback()
+        release_connection(conn)
+
+
+def release_connection(conn: sqlite3.Connection) -> None:
+    """Close a connection from get_connection() unless it is shared."""
+    if conn is not _held_connection and conn is not _deferred:
+        conn.close()
+
+
 def get_connection() -> sqlite3.Connection:
     """Ensure directory and return connection."""
-    DB_DIR.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    if _deferred is not None:
+        return _deferred  # type: ignore[return-value]
+    if _held_connection is not None:
+        return _held_connection
+    if is_memory_database(DB_PATH):
+        configure_database(DB_PATH)
+        assert _held_connection is not None
+        return _held_connection
+    if isinstance(DB_PATH, Path):
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    return _connect(DB_PATH)
+
+
+def data_version() -> tuple[int, int, int, int]:
+    """Token that changes whenever the database contents may have changed.
+
+    PRAGMA data_version on a long-lived connection changes when any other
+    connection commits, including other processes and this process's
+    per-call connections. Writes made on the watching connection itself
+    (the held in-memory connection) show up in its total_changes instead,
+    and uncommitted writes under deferred_commits() in the shared
+    connection's total_changes.
+    """
+    global _version_connection
+
+    conn = _held_connection
+    if conn is None:
+        if is_memory_database(DB_PATH):
+            conn = get_connection()
+        else:
+            if _version_connection is None:
+                _version_connection = _connect(DB_PATH, check_same_thread=False)
+            conn = _version_connection
+    version = conn.execute(q.SELECT_DATA_VERSION).fetchone()[0]
+    deferred_changes = _deferred.total_changes if _deferred is not None else 0
+    return _configuration, version, conn.total_changes, deferred_changes
+
+
+def get_read_connection() -> sqlite3.Connection:
+    """Return the connection read queries should use."""
+    conn = _read_connection.get()
+    return conn if conn is not None else get_connection()
+
+
+@contextmanager
+def read_from(conn: sqlite3.Connection) -> Iterator[None]:
+    """Route read queries in this context to another connection (e.g. a replica)."""
+    token = _read_connection.set(conn)
+    try:
+        yield
+    finally:
+        _read_connection.reset(token)
+
+
+def is_read_routed() -> bool:
+    """Whether read queries are currently routed away from the live database."""
+    return _read_connection.get() is not None
 
 
 def init_db() -> None:
-    """Creates tables if they don't exist."""
+    """Creates tables and indexes if they don't exist, migrating older databases."""
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(q.CREATE_HABITS_TABLE)
+        cursor.execute(q.CREATE_COMPLETIONS_TABLE)
+        cursor.execute(q.CREATE_DUE_NOTIFICATIONS_TABLE)
+        cursor.execute(q.CREATE_EVENTS_TABLE)
+        cursor.execute(q.CREATE_CHECKPOINTS_TABLE)
+        cursor.execute(q.CREATE_HABIT_TAGS_TABLE)
+
+        # Databases created before deletes were soft or due dates were tracked
+        columns = {row[0] for row in cursor.execute(q.SELECT_HABIT_COLUMNS)}
+        if "deleted_at" not in columns:
+            cursor.execute(q.ADD_DELETED_AT_COLUMN)
+        if "next_due_date" not in columns:
+            cursor.execute(q.ADD_NEXT_DUE_DATE_COLUMN)
+
+        # Databases created before IDs were guaranteed never to be reused
+        habits_sql = cursor.execute(q.SELECT_TABLE_SQL, ("habits",)).fetchone()[0]
+        if "AUTOINCREMENT" not in habits_sql.upper():
+            _migrate_to_autoincrement(conn)
+
+        if "next_due_date" not in columns:
+            refresh_next_due_dates(cursor)
+
+        for statement in q.CREATE_INDEXES:
+            cursor.execute(statement)
+
+        # Databases created before the event log: record the current state
+        if cursor.execute(q.SELECT_ANY_EVENT).fetchone() is None:
+            cursor.execute(q.DELETE_ORPHAN_COMPLETIONS)
+            append_created_events(cursor, first_habit_id=0, first_completion_id=0)
 
-        cursor.execute(
-            """
-        CREATE TABLE IF NOT EXISTS habits (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            description TEXT,
-            periodicity TEXT NOT NULL,
-            start_date TEXT NOT NULL
-        )
-        """
-        )
+        conn.commit()
 
-        cursor.execute(
-            """
-        CREATE TABLE IF NOT EXISTS completions (
-            id INTEGER PRIMARY KEY,
-            habit_id INTEGER NOT NULL,
-            completion_date TEXT NOT NULL,
-            FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
-        )
-        """
-        )
 
+def _migrate_to_autoincrement(conn: sqlite3.Connection) -> None:
+    """Rebuild habits and completions so their IDs are never reissued."""
+    # Only takes effect outside a transaction
+    conn.execute(q.DISABLE_FOREIGN_KEYS)
+    try:
+        begin_write(conn)
+        for statement in q.MIGRATE_TO_AUTOINCREMENT:
+            conn.execute(statement)
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(q.ENABLE_FOREIGN_KEYS)
+
+
+def begin_write(conn: sqlite3.Connection) -> None:
+    """Start a write transaction now, unless one is already open."""
+    if not conn.in_transaction:
+        conn.execute(q.BEGIN_IMMEDIATE)
+
+
+def append_created_events(
+    cursor: sqlite3.Cursor, first_habit_id: int | None, first_completion_id: int | None
+) -> None:
+    """Append habit_created/completed events for rows from the given IDs on."""
+    if first_habit_id is not None:
+        cursor.execute(q.APPEND_HABIT_CREATED_EVENTS, (first_habit_id,))
+    if first_completion_id is not None:
+        cursor.execute(q.APPEND_COMPLETED_EVENTS, (first_completion_id,))
+
+
+def refresh_next_due_dates(cursor: sqlite3.Cursor) -> None:
+    """Recompute next_due_date for every habit from its latest completion."""
+    rows = cursor.execute(q.SELECT_LATEST_COMPLETION_PER_HABIT).fetchall()
+    cursor.executemany(
+        q.SET_NEXT_DUE_DATE,
+        [
+            (get_next_due_date(periodicity, latest), habit_id)
+            for habit_id, periodicity, latest in rows
+        ],
+    )
+    cursor.execute(q.CLEAR_NEXT_DUE_DATES_WITHOUT_COMPLETIONS)
+
+
+def _refresh_next_due_date(cursor: sqlite3.Cursor, habit_id: int) -> None:
+    """Recompute next_due_date for one habit from its latest completion."""
+    habit = cursor.execute(q.SELECT_PERIODICITY_BY_ID, (habit_id,)).fetchone()
+    latest = cursor.execute(
+        q.SELECT_LATEST_COMPLETION_BY_HABIT_ID, (habit_id,)
+    ).fetchone()
+    due = get_next_due_date(habit[0], latest[2]) if habit and latest else None
+    cursor.execute(q.SET_NEXT_DUE_DATE, (due, habit_id))
+
+
+def _advance_next_due_dates(
+    cursor: sqlite3.Cursor, completions: list[CreateCompletionBody]
+) -> None:
+    """Move next_due_date forward for the habits of newly added completions."""
+    latest: dict[int, str] = {}
+    for c in completions:
+        if c["completion_date"] > latest.get(c["habit_id"], ""):
+            latest[c["habit_id"]] = c["completion_date"]
+
+    updates = []
+    for habit_id, completion_date in latest.items():
+        row = cursor.execute(q.SELECT_PERIODICITY_BY_ID, (habit_id,)).fetchone()
+        if row:
+            due = get_next_due_date(row[0], completion_date)
+            updates.append((due, habit_id, due))
+    cursor.executemany(q.ADVANCE_NEXT_DUE_DATE, updates)
 
 
 def generate_completions(
@@ -84,57 +376,49 @@ def seed_initial_habits(initial_habits) -> None:
         cursor = conn.cursor()
 
         # Check if any habits already exist
-        cursor.execute("SELECT COUNT(*) FROM habits")
+        cursor.execute(q.COUNT_HABITS)
         count = cursor.fetchone()[0]
 
         if count > 0:
             return
 
-        # Insert habits
-        cursor.executemany(
-            """
-        INSERT INTO habits (name, description, periodicity, start_date)
-        VALUES (?, ?, ?, ?)
-        """,
-            initial_habits,
+        begin_write(conn)
+        first_habit_id = cursor.execute(q.SELECT_MAX_HABIT_ID).fetchone()[0] + 1
+        first_completion_id = (
+            cursor.execute(q.SELECT_MAX_COMPLETION_ID).fetchone()[0] + 1
         )
 
-        # Get the IDs of the newly inserted habits
-        cursor.execute("SELECT id, periodicity, start_date FROM habits")
-        habits = cursor.fetchall()
+        # Insert habits, keeping their IDs for the completion rows
+        habits = []
+        for habit in initial_habits:
+            cursor.execute(q.INSERT_HABIT, habit)
+            habits.append((cursor.lastrowid, habit[2], date.fromisoformat(habit[3])))
 
-        # Generate and insert completions for each habit
-        for habit_id, periodicity, start_date in habits:
-            start_date = (
-                date.fromisoformat(start_date)
-                if isinstance(start_date, str)
-                else start_date
-            )
-            completions = generate_completions(habit_id, periodicity, start_date)
-
-            cursor.executemany(
-                """
-            INSERT INTO completions (habit_id, completion_date)
-            VALUES (?, ?)
-            """,
-                completions,
-            )
+        # Insert all generated completions in one statement
+        cursor.executemany(
+            q.INSERT_COMPLETION,
+            chain.from_iterable(
+                generate_completions(habit_id, periodicity, start_date)
+                for habit_id, periodicity, start_date in habits
+            ),
+        )
 
+        append_created_events(cursor, first_habit_id, first_completion_id)
+        refresh_next_due_dates(cursor)
         conn.commit()
+        # stderr, so machine-readable output on stdout stays parseable
         print(
-            f"Seeded {len(initial_habits)} initial habits with 4 weeks of completion data."
+            f"Seeded {len(initial_habits)} initial habits with 4 weeks of completion data.",
+            file=sys.stderr,
         )
 
 
-def add_habit(habit: CreateHabitBody) -> int | None:
-    """Add a new habit to the database."""
+def add_habit(habit: CreateHabitBody, tags: list[str] | None = None) -> int | None:
+    """Add a new habit, and optionally its tags, to the database in one commit."""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """
-        INSERT INTO habits (name, description, periodicity, start_date)
-        VALUES (?, ?, ?, ?)
-        """,
+            q.INSERT_HABIT,
             (
                 habit["name"],
                 habit.get("description", ""),
@@ -142,32 +426,44 @@ def add_habit(habit: CreateHabitBody) -> int | None:
                 habit["start_date"],
             ),
         )
+        habit_id = cursor.lastrowid
+        if tags:
+            cursor.executemany(q.INSERT_HABIT_TAG, [(tag, habit_id) for tag in tags])
+        append_created_events(cursor, habit_id, None)
         conn.commit()
-        return cursor.lastrowid
+        return habit_id
 
 
 def query_habits() -> list[HabitType]:
     """Retrieve all habits from the database."""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, name, description, periodicity, start_date FROM habits"
-        )
+        cursor.execute(q.SELECT_HABITS)
         rows = cursor.fetchall()
         return [parse_habit_row(row) for row in rows]
 
 
+def iter_habits(
+    period: Periodicity | None = None, tag: str | None = None
+) -> Iterator[HabitType]:
+    """Stream habits, optionally of one periodicity and tag, straight from the cursor."""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        if tag is not None:
+            cursor.execute(q.SELECT_HABITS_BY_TAG, {"tag": tag, "period": period})
+        elif period is None:
+            cursor.execute(q.SELECT_HABITS)
+        else:
+            cursor.execute(q.SELECT_HABITS_BY_PERIOD, (period,))
+        for row in cursor:
+            yield parse_habit_row(row)
+
+
 def query_habit_by_id(habit_id: int) -> HabitType | None:
     """Retrieve a single habit by its ID."""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """
-        SELECT id, name, description, periodicity, start_date
-        FROM habits WHERE id = ?
-        """,
-            (habit_id,),
-        )
+        cursor.execute(q.SELECT_HABIT_BY_ID, (habit_id,))
         row = cursor.fetchone()
         if row:
             return parse_habit_row(row)
@@ -175,27 +471,50 @@ def query_habit_by_id(habit_id: int) -> HabitType | None:
 
 
 def delete_habit_by_id(habit_id: int) -> bool:
-    """Delete a habit by its ID."""
+    """Mark a habit deleted; its rows are removed later by purge_deleted_habits."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
+        cursor.execute(q.SOFT_DELETE_HABIT_BY_ID, (habit_id,))
+        deleted = cursor.rowcount > 0
+        if deleted:
+            cursor.execute(q.APPEND_DELETED_EVENT, (habit_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        return deleted
 
 
-def query_habits_by_period(period: Periodicity) -> list[HabitType]:
-    """Retrieve all habits from the database."""
+def add_habit_tags(habit_id: int, tags: list[str]) -> int:
+    """Tag a habit, ignoring tags it already has; returns how many were added."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """
-        SELECT id, name, description, periodicity, start_date 
-        FROM habits 
-        WHERE periodicity = ?
-        
-        """,
-            (period,),
+        cursor.executemany(q.INSERT_HABIT_TAG, [(tag, habit_id) for tag in tags])
+        added = cursor.rowcount
+        conn.commit()
+        return added
+
+
+def remove_habit_tags(habit_id: int, tags: list[str]) -> int:
+    """Remove tags from a habit; returns how many it had."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(q.DELETE_HABIT_TAG, [(tag, habit_id) for tag in tags])
+        removed = cursor.rowcount
+        conn.commit()
+        return removed
+
+
+def iter_tag_member_totals(tag: str, today: str) -> Iterator[tuple[str, str, int, int]]:
+    """Stream (periodicity, start_date, active, completions) for each habit with a tag."""
+    with get_read_connection() as conn:
+        yield from conn.execute(
+            q.SELECT_TAG_MEMBER_TOTALS, {"tag": tag, "today": today}
         )
+
+
+def query_habits_by_period(period: Periodicity) -> list[HabitType]:
+    """Retrieve all habits from the database."""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(q.SELECT_HABITS_BY_PERIOD, (period,))
         rows = cursor.fetchall()
         return [parse_habit_row(row) for row in rows]
 
@@ -204,45 +523,54 @@ def query_completions_by_habit_id(
     habit_id: int, order: SortOrder = "ASC"
 ) -> list[CompletionType]:
     """Retrieve completions for a habit by habit's ID."""
-    order_clause = "ASC" if order == "ASC" else "DESC"
+    sql = q.SELECT_COMPLETIONS_BY_HABIT_ID[order]
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            f"""
-            SELECT id, habit_id, completion_date
-            FROM completions 
-            WHERE habit_id = ?
-            ORDER BY completion_date {order_clause}
-        """,
-            (habit_id,),
-        )
-        return [
-            {"id": row[0], "habit_id": row[1], "completion_date": row[2]}
-            for row in cursor.fetchall()
-        ]
+        cursor.execute(sql, (habit_id,))
+        return [parse_completion_row(row) for row in cursor.fetchall()]
+
+
+def query_completion_dates_by_habit_id(
+    habit_id: int, order: SortOrder = "ASC"
+) -> list[str]:
+    """Retrieve only the completion dates for a habit by habit's ID."""
+    sql = q.SELECT_COMPLETION_DATES_BY_HABIT_ID[order]
+
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, (habit_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def iter_habit_completion_rows() -> Iterator[tuple]:
+    """Stream habits joined with their completions, ordered by habit and date."""
+    with get_read_connection() as conn:
+        yield from conn.execute(q.SELECT_HABIT_COMPLETION_ROWS)
+
+
+def query_adjacent_completion_dates(
+    habit_id: int, completion_date: str
+) -> tuple[str | None, str | None]:
+    """Latest completion date on or before a date, and the first one after it."""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        before = cursor.execute(
+            q.SELECT_COMPLETION_DATE_ON_OR_BEFORE, (habit_id, completion_date)
+        ).fetchone()
+        after = cursor.execute(
+            q.SELECT_COMPLETION_DATE_AFTER, (habit_id, completion_date)
+        ).fetchone()
+        return (before[0] if before else None, after[0] if after else None)
 
 
 def query_latest_completion_by_habit_id(habit_id: int) -> CompletionType | None:
     """Retrieves the most recent completion for a habit, or None if none exists."""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, habit_id, completion_date
-            FROM completions
-            WHERE habit_id = ?
-            ORDER BY completion_date DESC
-            LIMIT 1
-        """,
-            (habit_id,),
-        )
+        cursor.execute(q.SELECT_LATEST_COMPLETION_BY_HABIT_ID, (habit_id,))
         row = cursor.fetchone()
-        return (
-            {"id": row[0], "habit_id": row[1], "completion_date": row[2]}
-            if row
-            else None
-        )
+        return parse_completion_row(row) if row else None
 
 
 def add_completion(completion: CreateCompletionBody) -> int | None:
@@ -250,14 +578,81 @@ def add_completion(completion: CreateCompletionBody) -> int | None:
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """
-            INSERT INTO completions (habit_id, completion_date)
-            VALUES (?, ?)
-        """,
+            q.INSERT_COMPLETION,
             (
                 completion["habit_id"],
                 completion["completion_date"],
             ),
         )
+        completion_id = cursor.lastrowid
+        append_created_events(cursor, None, completion_id)
+        _advance_next_due_dates(cursor, [completion])
+        conn.commit()
+        return completion_id
+
+
+def delete_completions_on_date(habit_id: int, completion_date: str) -> int:
+    """Delete a habit's completions on one date; returns how many were removed."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        begin_write(conn)
+        ids = [
+            row[0]
+            for row in cursor.execute(
+                q.SELECT_COMPLETION_IDS_ON_DATE, (habit_id, completion_date)
+            ).fetchall()
+        ]
+        for completion_id in ids:
+            cursor.execute(q.DELETE_COMPLETION_BY_ID, (completion_id,))
+            cursor.execute(
+                q.APPEND_UNCOMPLETED_EVENT, (habit_id, completion_id, completion_date)
+            )
+        if ids:
+            _refresh_next_due_date(cursor, habit_id)
+        conn.commit()
+        return len(ids)
+
+
+def add_completions(completions: list[CreateCompletionBody]) -> None:
+    """Add many habit completion entries in a single commit, skipping deleted habits."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        begin_write(conn)
+        first_id = cursor.execute(q.SELECT_MAX_COMPLETION_ID).fetchone()[0] + 1
+        cursor.executemany(
+            q.INSERT_COMPLETION_IF_HABIT_EXISTS,
+            [(c["completion_date"], c["habit_id"]) for c in completions],
+        )
+        append_created_events(cursor, None, first_id)
+        _advance_next_due_dates(cursor, completions)
+        conn.commit()
+
+
+def query_due_habits(since: str, until: str) -> list[DueHabitType]:
+    """Retrieve habits whose next due date falls between two dates (inclusive)."""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(q.SELECT_DUE_HABITS, (since, until))
+        return [parse_due_habit_row(row) for row in cursor.fetchall()]
+
+
+def claim_changed_due_habits(since: str, until: str) -> list[DueHabitType]:
+    """Retrieve due habits not yet reported for their current due date and mark them."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(q.SELECT_CHANGED_DUE_HABITS, (since, until))
+        habits = [parse_due_habit_row(row) for row in cursor.fetchall()]
+        cursor.executemany(
+            q.UPSERT_DUE_NOTIFICATION,
+            [(h["id"], h["next_due_date"]) for h in habits],
+        )
         conn.commit()
-        return cursor.lastrowid
+        return habits
+
+
+def query_changes_since(seq: int, limit: int = 1000) -> list[ChangeType]:
+    """Retrieve up to limit logged changes with a sequence number above seq."""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(q.SELECT_EVENTS_SINCE, (seq, limit))
+        return [parse_change_row(row) for row in cursor.fetchall()]
@@ -1,10 +1,61 @@
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import date
+from functools import lru_cache
 
 from src.core.constants import PERIOD_DELTAS
 from src.core.model import Periodicity
+from src.core.periodicity import get_cadence
 
-parse_date = lambda s: datetime.strptime(s, "%Y-%m-%d").date()
+# Completion dates repeat a lot (a few thousand distinct days vs. millions of
+# rows), so a bounded cache of decoded dates has a very high hit rate
+DATE_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(s: str) -> date:
+    """Parses a strict YYYY-MM-DD string.
+
+    Raises:
+        ValueError: If s is not a valid date in exactly that format
+    """
+    # fromisoformat alone also accepts forms like "20250101" or "2025-W01-1"
+    if len(s) != 10 or s[4] != "-" or s[7] != "-":
+        raise ValueError(f"Invalid date {s!r}, expected YYYY-MM-DD")
+    return date.fromisoformat(s)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_ordinal(s: str) -> int:
+    """Parses a strict YYYY-MM-DD string into its proleptic Gregorian ordinal."""
+    return parse_date(s).toordinal()
+
+
+def parse_ordinals(values: Iterable[str]) -> list[int]:
+    """Decodes a whole column of YYYY-MM-DD strings into day ordinals."""
+    return list(map(parse_ordinal, values))
 
 
 def get_period_delta(p: Periodicity) -> int:
+    """Days between completions for the fixed daily/weekly/biweekly periodicities."""
     return PERIOD_DELTAS[p]
+
+
+def get_next_due_date(p: Periodicity, last_completion_date: str) -> str:
+    """Last date a completion keeps the streak alive, given the latest completion."""
+    cadence = get_cadence(p)
+    last_index = cadence.index(parse_ordinal(last_completion_date))
+    return date.fromordinal(cadence.deadline(last_index)).isoformat()
+
+
+def parse_duration(value: str) -> int:
+    """Parses a duration like "3", "3d" or "2w" into a number of days."""
+    value = value.strip().lower()
+    unit = 1
+    if value.endswith("d"):
+        value = value[:-1]
+    elif value.endswith("w"):
+        value, unit = value[:-1], 7
+
+    if not value.isdigit():
+        raise ValueError(f"Invalid duration: {value!r}")
+    return int(value) * unit
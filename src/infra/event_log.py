@@ -0,0 +1,101 @@
+import sqlite3
+
+from src.infra import database
+from src.infra import queries as q
+from src.infra.database import begin_write, refresh_next_due_dates
+
+
+def last_checkpoint() -> int:
+    """Sequence number of the latest checkpoint (0 if there is none)."""
+    with database.get_connection() as conn:
+        return conn.execute(q.SELECT_LAST_CHECKPOINT).fetchone()[0]
+
+
+def checkpoint() -> int:
+    """Records that the projections reflect every event logged so far.
+
+    Returns:
+        int: The checkpointed sequence number
+    """
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        seq = cursor.execute(q.SELECT_MAX_EVENT_SEQ).fetchone()[0]
+        cursor.execute(q.INSERT_CHECKPOINT, (seq,))
+        conn.commit()
+        return seq
+
+
+def replay_events(since: int | None = None) -> int:
+    """Applies logged events to the habits and completions projections.
+
+    Args:
+        since (int | None): Only apply events after this sequence number;
+            defaults to the latest checkpoint
+
+    Returns:
+        int: Sequence number the projections are now up to date with
+
+    Note:
+        Replay runs as a handful of set-based statements over the log rather
+        than one statement per event, and is idempotent.
+    """
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        if since is None:
+            since = cursor.execute(q.SELECT_LAST_CHECKPOINT).fetchone()[0]
+
+        begin_write(conn)
+        seq = _replay(cursor, since)
+        conn.commit()
+        return seq
+
+
+def rebuild_projections() -> int:
+    """Discards the habits and completions tables and rebuilds them from the log.
+
+    Returns:
+        int: Sequence number the projections were rebuilt up to
+    """
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        begin_write(conn)
+        cursor.execute(q.CLEAR_COMPLETIONS)
+        cursor.execute(q.CLEAR_HABITS)
+        seq = _replay(cursor, 0)
+        conn.commit()
+        return seq
+
+
+def _replay(cursor: sqlite3.Cursor, since: int) -> int:
+    for statement in [
+        q.REPLAY_DELETED_COMPLETIONS,
+        q.REPLAY_DELETED_HABITS,
+        q.REPLAY_UNCOMPLETED,
+        q.REPLAY_HABIT_CREATED,
+        q.REPLAY_COMPLETED,
+    ]:
+        cursor.execute(statement, (since,))
+    refresh_next_due_dates(cursor)
+
+    seq = cursor.execute(q.SELECT_MAX_EVENT_SEQ).fetchone()[0]
+    cursor.execute(q.INSERT_CHECKPOINT, (seq,))
+    return seq
+
+
+def sweep_orphans(vacuum: bool = True) -> int:
+    """Deletes rows whose habit no longer exists and optionally reclaims space.
+
+    Returns:
+        int: Number of orphaned completions removed
+    """
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(q.DELETE_ORPHAN_COMPLETIONS)
+        removed = cursor.rowcount
+        cursor.execute(q.DELETE_ORPHAN_DUE_NOTIFICATIONS)
+        cursor.execute(q.DELETE_ORPHAN_HABIT_TAGS)
+        conn.commit()
+
+        if vacuum:
+            conn.execute(q.VACUUM)
+        return removed
@@ -0,0 +1,202 @@
+"""Compact, memory-mapped snapshot of habits and their completion days.
+
+File layout (little-endian, every array section 8-byte aligned):
+
+    header        magic, version, habit count n, ordinal count m,
+                  spec table size, name table size
+    ids           int64[n]    habit IDs, ascending
+    starts        int32[n]    start dates as day ordinals
+    specs         int32[n]    index into the spec table
+    offsets       int64[n+1]  habit i's completions start at ordinals[offsets[i]]
+    name_offsets  int64[n+1]  habit i's name starts at names[name_offsets[i]]
+    ordinals      int32[m]    completion dates as day ordinals, ascending per habit
+    spec table    UTF-8, newline separated periodicity specs
+    names         UTF-8
+
+Readers mmap the file and hand out memoryview slices, so opening is
+instant regardless of size and worker processes share the page cache.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+
+from src.infra.database import iter_habit_completion_rows
+from src.infra.date_utils import parse_ordinal
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+MAGIC = b"HABITORD"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+
+
+def export_ordinal_snapshot(path: str | Path) -> tuple[int, int]:
+    """Writes every habit and its completion days to a snapshot file.
+
+    The file is written next to path and moved into place, so readers never
+    see a partial snapshot.
+
+    Returns:
+        tuple[int, int]: Number of habits and completions exported
+    """
+    ids, starts, spec_indexes = array("q"), array("i"), array("i")
+    offsets, name_offsets, ordinals = array("q", [0]), array("q", [0]), array("i")
+    specs: dict[str, int] = {}
+    names = bytearray()
+
+    for (
+        habit_id,
+        name,
+        periodicity,
+        start_date,
+        completion_date,
+    ) in iter_habit_completion_rows():
+        if not ids or ids[-1] != habit_id:
+            if ids:
+                offsets.append(len(ordinals))
+            ids.append(habit_id)
+            starts.append(parse_ordinal(start_date))
+            spec_indexes.append(specs.setdefault(periodicity, len(specs)))
+            names += name.encode()
+            name_offsets.append(len(names))
+        if completion_date is not None:
+            ordinals.append(parse_ordinal(completion_date))
+    if ids:
+        offsets.append(len(ordinals))
+
+    spec_table = "\n".join(specs).encode()
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC, VERSION, len(ids), len(ordinals), len(spec_table), len(names)
+            )
+        )
+        for section in [ids, starts, spec_indexes, offsets, name_offsets, ordinals]:
+            if sys.byteorder != "little":
+                section.byteswap()
+            f.write(section.tobytes())
+            f.write(b"\0" * (-f.tell() % 8))
+        f.write(spec_table)
+        f.write(names)
+    os.replace(tmp_path, path)
+
+    return len(ids), len(ordinals)
+
+
+class OrdinalSnapshot:
+    """Read-only, memory-mapped view of a file written by export_ordinal_snapshot.
+
+    Completion ordinals are returned as memoryview slices of the mapping (or
+    NumPy arrays over it, see ordinals_array) without copying. They stay
+    valid until close(); close() leaves the mapping to the garbage collector
+    while any of them is still referenced.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        if sys.byteorder != "little":
+            raise ValueError(
+                "Ordinal snapshots can only be read on little-endian hosts."
+            )
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._views = [self._buffer]
+
+        if len(self._buffer) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an ordinal snapshot.")
+        magic, version, habit_count, ordinal_count, specs_size, names_size = (
+            HEADER.unpack_from(self._buffer)
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} ordinal snapshot.")
+
+        self._pos = HEADER.size
+        self.ids = self._section("q", habit_count)
+        self.starts = self._section("i", habit_count)
+        self._spec_indexes = self._section("i", habit_count)
+        self._offsets = self._section("q", habit_count + 1)
+        self._name_offsets = self._section("q", habit_count + 1)
+        self._ordinals = self._section("i", ordinal_count)
+
+        spec_table = bytes(self._buffer[self._pos : self._pos + specs_size])
+        self.specs = spec_table.decode().split("\n") if spec_table else []
+        self._pos += specs_size
+        self._names = self._buffer[self._pos : self._pos + names_size]
+        self._views.append(self._names)
+
+    def _section(self, fmt: str, count: int) -> memoryview:
+        size = count * struct.calcsize(fmt)
+        view = self._buffer[self._pos : self._pos + size].cast(fmt)
+        self._pos += size + (-size % 8)
+        self._views.append(view)
+        return view
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __enter__(self) -> "OrdinalSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def position(self, habit_id: int) -> int:
+        """Index of a habit in the snapshot.
+
+        Raises:
+            KeyError: If the habit is not in the snapshot
+        """
+        i = bisect.bisect_left(self.ids, habit_id)
+        if i == len(self.ids) or self.ids[i] != habit_id:
+            raise KeyError(habit_id)
+        return i
+
+    def name(self, i: int) -> str:
+        return str(
+            self._names[self._name_offsets[i] : self._name_offsets[i + 1]], "utf-8"
+        )
+
+    def periodicity(self, i: int) -> str:
+        return self.specs[self._spec_indexes[i]]
+
+    def ordinals(self, i: int) -> memoryview:
+        """Completion days of the habit at index i, ascending, without copying."""
+        return self._ordinals[self._offsets[i] : self._offsets[i + 1]]
+
+    def ordinals_array(self, i: int):
+        """Like ordinals, as a NumPy int32 array sharing the mapped memory.
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("ordinals_array requires NumPy (pip install numpy).")
+        return np.frombuffer(self.ordinals(i), dtype=np.int32)
+
+    def entries(self) -> Iterator[tuple[int, str, memoryview]]:
+        """Yields (habit_id, periodicity, ordinals) for every habit in ID order."""
+        for i in range(len(self.ids)):
+            yield self.ids[i], self.periodicity(i), self.ordinals(i)
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Callers still hold ordinal views; the mapping closes once they're gone
+            pass
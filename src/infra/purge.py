@@ -0,0 +1,63 @@
+import time
+from collections.abc import Callable
+
+from src.infra import database
+from src.infra import queries as q
+from src.infra.database import begin_write
+
+PURGE_CHUNK_SIZE = 5000
+
+
+def purge_deleted_habits(
+    chunk_size: int = PURGE_CHUNK_SIZE,
+    pause: float = 0.0,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> tuple[int, int]:
+    """Removes deleted habits and their completions from the database.
+
+    Deleting a habit only marks it deleted, so it returns immediately no
+    matter how long its history is. This does the actual work: completions
+    go in chunks of chunk_size, one short transaction each, so writers such
+    as `complete` only ever wait for a single chunk. Safe to interrupt and to
+    run while the tracker is in use.
+
+    Args:
+        chunk_size (int): Completions removed per transaction
+        pause (float): Seconds to sleep between chunks, leaving the write
+            lock free for other writers
+        on_progress (Callable[[int, int], None] | None): Called after every
+            chunk with the habit ID and its completions removed so far
+
+    Returns:
+        tuple[int, int]: Number of habits and completions removed
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+
+    habits = completions = 0
+    with database.get_connection() as conn:
+        habit_ids = [row[0] for row in conn.execute(q.SELECT_DELETED_HABIT_IDS)]
+
+        for habit_id in habit_ids:
+            removed = 0
+            while True:
+                begin_write(conn)
+                chunk = conn.execute(
+                    q.DELETE_COMPLETIONS_CHUNK, (habit_id, chunk_size)
+                ).rowcount
+                conn.commit()
+                removed += chunk
+                if on_progress is not None:
+                    on_progress(habit_id, removed)
+                if chunk < chunk_size:
+                    break
+                if pause:
+                    time.sleep(pause)
+
+            begin_write(conn)
+            conn.execute(q.DELETE_HABIT_TAGS_BY_HABIT_ID, (habit_id,))
+            habits += conn.execute(q.PURGE_HABIT_BY_ID, (habit_id,)).rowcount
+            conn.commit()
+            completions += removed
+
+    return habits, completions
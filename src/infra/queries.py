@@ -0,0 +1,618 @@
+"""Every SQL statement the database layer runs.
+
+Statements are constant strings so SQLite's per-connection statement cache
+can reuse them; never build SQL with string formatting. Variants (e.g. sort
+order) get their own constant.
+"""
+
+from src.core.model import SortOrder
+
+# Statement cache size per connection, comfortably above the number of
+# statements in this module
+CACHED_STATEMENTS = 128
+
+# AUTOINCREMENT on habits and completions so IDs are never reissued, not even
+# after a purge: the event log and change feed consumers key on them
+CREATE_HABITS_TABLE = """
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    periodicity TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    next_due_date TEXT,
+    deleted_at TEXT
+)
+"""
+
+CREATE_COMPLETIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS completions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    habit_id INTEGER NOT NULL,
+    completion_date TEXT NOT NULL,
+    FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+)
+"""
+
+CREATE_DUE_NOTIFICATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS due_notifications (
+    habit_id INTEGER PRIMARY KEY,
+    next_due_date TEXT NOT NULL,
+    FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+)
+"""
+
+# Append-only source of truth; habits and completions are projections of it.
+# AUTOINCREMENT so sequence numbers are never reused.
+CREATE_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    habit_id INTEGER NOT NULL,
+    completion_id INTEGER,
+    completion_date TEXT,
+    payload TEXT,
+    recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+CREATE_CHECKPOINTS_TABLE = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Keyed by tag first, so a tag's members are one index range scan. No foreign
+# key: rebuilding the projections deletes and reinserts every habit under the
+# same ID, and the tags must survive that. Deleting a habit removes its tags.
+CREATE_HABIT_TAGS_TABLE = """
+CREATE TABLE IF NOT EXISTS habit_tags (
+    tag TEXT NOT NULL,
+    habit_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, habit_id)
+) WITHOUT ROWID
+"""
+
+CREATE_INDEXES = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_completions_habit_date
+    ON completions (habit_id, completion_date)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_habits_next_due_date
+    ON habits (next_due_date)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_events_completion_id
+    ON events (completion_id, seq)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_habit_tags_habit_id
+    ON habit_tags (habit_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_habits_deleted_at
+    ON habits (deleted_at) WHERE deleted_at IS NOT NULL
+    """,
+]
+
+# Bulk loads drop these and rerun CREATE_INDEXES afterwards
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS idx_completions_habit_date",
+    "DROP INDEX IF EXISTS idx_habits_next_due_date",
+]
+
+SELECT_HABIT_COLUMNS = "SELECT name FROM pragma_table_info('habits')"
+
+ADD_NEXT_DUE_DATE_COLUMN = "ALTER TABLE habits ADD COLUMN next_due_date TEXT"
+
+ADD_DELETED_AT_COLUMN = "ALTER TABLE habits ADD COLUMN deleted_at TEXT"
+
+SELECT_DATA_VERSION = "PRAGMA data_version"
+
+# Off by default in SQLite; needed for ON DELETE CASCADE to fire
+ENABLE_FOREIGN_KEYS = "PRAGMA foreign_keys = ON"
+
+DISABLE_FOREIGN_KEYS = "PRAGMA foreign_keys = OFF"
+
+SELECT_TABLE_SQL = "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?"
+
+# Databases whose habits and completions predate AUTOINCREMENT are rebuilt
+# with it, foreign keys off so dropping the old tables cascades nowhere. The
+# sequences start above every ID the event log has seen, purged ones included.
+MIGRATE_TO_AUTOINCREMENT = [
+    """
+    CREATE TABLE habits_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        periodicity TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        next_due_date TEXT,
+        deleted_at TEXT
+    )
+    """,
+    """
+    INSERT INTO habits_new
+        (id, name, description, periodicity, start_date, next_due_date, deleted_at)
+    SELECT id, name, description, periodicity, start_date, next_due_date, deleted_at
+    FROM habits
+    """,
+    "DROP TABLE habits",
+    "ALTER TABLE habits_new RENAME TO habits",
+    """
+    CREATE TABLE completions_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER NOT NULL,
+        completion_date TEXT NOT NULL,
+        FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    INSERT INTO completions_new (id, habit_id, completion_date)
+    SELECT id, habit_id, completion_date FROM completions
+    """,
+    "DROP TABLE completions",
+    "ALTER TABLE completions_new RENAME TO completions",
+    "DELETE FROM sqlite_sequence WHERE name IN ('habits', 'completions')",
+    """
+    INSERT INTO sqlite_sequence (name, seq)
+    SELECT 'habits', MAX(
+        (SELECT COALESCE(MAX(id), 0) FROM habits),
+        (SELECT COALESCE(MAX(habit_id), 0) FROM events)
+    )
+    """,
+    """
+    INSERT INTO sqlite_sequence (name, seq)
+    SELECT 'completions', MAX(
+        (SELECT COALESCE(MAX(id), 0) FROM completions),
+        (SELECT COALESCE(MAX(completion_id), 0) FROM events)
+    )
+    """,
+]
+
+SELECT_SYNCHRONOUS = "PRAGMA synchronous"
+
+# Bulk loads turn syncing off and restore the previous level, as read back
+# from SELECT_SYNCHRONOUS, afterwards
+SET_SYNCHRONOUS = {
+    0: "PRAGMA synchronous = OFF",
+    1: "PRAGMA synchronous = NORMAL",
+    2: "PRAGMA synchronous = FULL",
+    3: "PRAGMA synchronous = EXTRA",
+}
+
+# Takes the write lock up front instead of on the first write
+BEGIN_IMMEDIATE = "BEGIN IMMEDIATE"
+
+VACUUM = "VACUUM"
+
+# Replicas are read-only snapshots
+ENABLE_QUERY_ONLY = "PRAGMA query_only = ON"
+
+# One savepoint per operation in a WriteBatch, inside the batch transaction
+SAVEPOINT_OPERATION = "SAVEPOINT batch_operation"
+
+RELEASE_OPERATION = "RELEASE batch_operation"
+
+ROLLBACK_TO_OPERATION = "ROLLBACK TO batch_operation"
+
+# -------------------------
+# Habits
+# -------------------------
+
+# Deleted habits keep their row, with deleted_at set, until purged; every
+# query below that reads habits or their completions skips them
+
+COUNT_HABITS = "SELECT COUNT(*) FROM habits"
+
+INSERT_HABIT = """
+INSERT INTO habits (name, description, periodicity, start_date)
+VALUES (?, ?, ?, ?)
+"""
+
+INSERT_HABIT_WITH_ID = """
+INSERT INTO habits (id, name, description, periodicity, start_date)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+# Highest ID ever issued, including purged rows, so bulk loads that pick
+# their own IDs never reuse one
+SELECT_MAX_HABIT_ID = """
+SELECT MAX(
+    (SELECT COALESCE(MAX(id), 0) FROM habits),
+    (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'habits')
+)
+"""
+
+SELECT_MAX_COMPLETION_ID = """
+SELECT MAX(
+    (SELECT COALESCE(MAX(id), 0) FROM completions),
+    (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'completions')
+)
+"""
+
+SELECT_HABITS = """
+SELECT id, name, description, periodicity, start_date
+FROM habits
+WHERE deleted_at IS NULL
+"""
+
+SELECT_HABIT_BY_ID = """
+SELECT id, name, description, periodicity, start_date
+FROM habits WHERE id = ? AND deleted_at IS NULL
+"""
+
+SELECT_HABITS_BY_PERIOD = """
+SELECT id, name, description, periodicity, start_date
+FROM habits
+WHERE periodicity = ? AND deleted_at IS NULL
+"""
+
+SELECT_HABITS_BY_TAG = """
+SELECT h.id, h.name, h.description, h.periodicity, h.start_date
+FROM habit_tags t
+JOIN habits h ON h.id = t.habit_id
+WHERE t.tag = :tag AND (:period IS NULL OR h.periodicity = :period)
+AND h.deleted_at IS NULL
+ORDER BY t.habit_id
+"""
+
+# Clearing next_due_date takes the habit out of idx_habits_next_due_date
+SOFT_DELETE_HABIT_BY_ID = """
+UPDATE habits SET deleted_at = CURRENT_TIMESTAMP, next_due_date = NULL
+WHERE id = ? AND deleted_at IS NULL
+"""
+
+INSERT_HABIT_TAG = "INSERT OR IGNORE INTO habit_tags (tag, habit_id) VALUES (?, ?)"
+
+DELETE_HABIT_TAG = "DELETE FROM habit_tags WHERE tag = ? AND habit_id = ?"
+
+DELETE_HABIT_TAGS_BY_HABIT_ID = "DELETE FROM habit_tags WHERE habit_id = ?"
+
+# One row per member of a tag: completions counted towards its completion
+# rate, and whether its streak is still alive (due today or later)
+SELECT_TAG_MEMBER_TOTALS = """
+SELECT h.periodicity, h.start_date,
+       COALESCE(h.next_due_date >= :today, 0),
+       COUNT(c.id)
+FROM habit_tags t
+JOIN habits h ON h.id = t.habit_id
+LEFT JOIN completions c
+    ON c.habit_id = h.id AND c.completion_date BETWEEN h.start_date AND :today
+WHERE t.tag = :tag AND h.deleted_at IS NULL
+GROUP BY t.habit_id
+"""
+
+SELECT_PERIODICITY_BY_ID = """
+SELECT periodicity FROM habits WHERE id = ? AND deleted_at IS NULL
+"""
+
+# Only ever moves the due date forward, so backdated completions are no-ops
+ADVANCE_NEXT_DUE_DATE = """
+UPDATE habits SET next_due_date = ?
+WHERE id = ? AND (next_due_date IS NULL OR next_due_date < ?)
+"""
+
+SELECT_LATEST_COMPLETION_PER_HABIT = """
+SELECT h.id, h.periodicity, MAX(c.completion_date)
+FROM habits h
+JOIN completions c ON c.habit_id = h.id
+WHERE h.deleted_at IS NULL
+GROUP BY h.id
+"""
+
+SET_NEXT_DUE_DATE = "UPDATE habits SET next_due_date = ? WHERE id = ?"
+
+CLEAR_NEXT_DUE_DATES_WITHOUT_COMPLETIONS = """
+UPDATE habits SET next_due_date = NULL
+WHERE next_due_date IS NOT NULL
+AND NOT EXISTS (SELECT 1 FROM completions c WHERE c.habit_id = habits.id)
+"""
+
+# -------------------------
+# Due dates
+# -------------------------
+
+SELECT_DUE_HABITS = """
+SELECT id, name, periodicity, next_due_date
+FROM habits
+WHERE next_due_date BETWEEN ? AND ? AND deleted_at IS NULL
+ORDER BY next_due_date, id
+"""
+
+# Due habits whose due date differs from the one last notified
+SELECT_CHANGED_DUE_HABITS = """
+SELECT h.id, h.name, h.periodicity, h.next_due_date
+FROM habits h
+LEFT JOIN due_notifications n ON n.habit_id = h.id
+WHERE h.next_due_date BETWEEN ? AND ? AND h.deleted_at IS NULL
+AND (n.next_due_date IS NULL OR n.next_due_date != h.next_due_date)
+ORDER BY h.next_due_date, h.id
+"""
+
+UPSERT_DUE_NOTIFICATION = """
+INSERT INTO due_notifications (habit_id, next_due_date) VALUES (?, ?)
+ON CONFLICT(habit_id) DO UPDATE SET next_due_date = excluded.next_due_date
+"""
+
+# -------------------------
+# Completions
+# -------------------------
+
+INSERT_COMPLETION = """
+INSERT INTO completions (habit_id, completion_date)
+VALUES (?, ?)
+"""
+
+# Bulk variant that skips completions whose habit was deleted meanwhile
+INSERT_COMPLETION_IF_HABIT_EXISTS = """
+INSERT INTO completions (habit_id, completion_date)
+SELECT id, ? FROM habits WHERE id = ? AND deleted_at IS NULL
+"""
+
+SELECT_COMPLETIONS_BY_HABIT_ID_ASC = """
+SELECT c.id, c.habit_id, c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date ASC
+"""
+
+SELECT_COMPLETIONS_BY_HABIT_ID_DESC = """
+SELECT c.id, c.habit_id, c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date DESC
+"""
+
+SELECT_COMPLETIONS_BY_HABIT_ID: dict[SortOrder, str] = {
+    "ASC": SELECT_COMPLETIONS_BY_HABIT_ID_ASC,
+    "DESC": SELECT_COMPLETIONS_BY_HABIT_ID_DESC,
+}
+
+SELECT_COMPLETION_DATES_BY_HABIT_ID_ASC = """
+SELECT c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date ASC
+"""
+
+SELECT_COMPLETION_DATES_BY_HABIT_ID_DESC = """
+SELECT c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date DESC
+"""
+
+SELECT_COMPLETION_DATES_BY_HABIT_ID: dict[SortOrder, str] = {
+    "ASC": SELECT_COMPLETION_DATES_BY_HABIT_ID_ASC,
+    "DESC": SELECT_COMPLETION_DATES_BY_HABIT_ID_DESC,
+}
+
+# Every habit with its completions in date order, one row per completion
+# (or a single NULL row for habits without any); walks idx_completions_habit_date
+SELECT_HABIT_COMPLETION_ROWS = """
+SELECT h.id, h.name, h.periodicity, h.start_date, c.completion_date
+FROM habits h
+LEFT JOIN completions c ON c.habit_id = h.id
+WHERE h.deleted_at IS NULL
+ORDER BY h.id, c.completion_date
+"""
+
+SELECT_LATEST_COMPLETION_BY_HABIT_ID = """
+SELECT c.id, c.habit_id, c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date DESC
+LIMIT 1
+"""
+
+# Neighbours of a date, each a single idx_completions_habit_date range probe
+SELECT_COMPLETION_DATE_ON_OR_BEFORE = """
+SELECT c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND c.completion_date <= ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date DESC
+LIMIT 1
+"""
+
+SELECT_COMPLETION_DATE_AFTER = """
+SELECT c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND c.completion_date > ? AND h.deleted_at IS NULL
+ORDER BY c.completion_date ASC
+LIMIT 1
+"""
+
+SELECT_COMPLETION_IDS_ON_DATE = """
+SELECT c.id
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.habit_id = ? AND c.completion_date = ? AND h.deleted_at IS NULL
+"""
+
+DELETE_COMPLETION_BY_ID = "DELETE FROM completions WHERE id = ?"
+
+# -------------------------
+# Event log
+# -------------------------
+
+# Events are copied from the rows just written, so the payload format is
+# defined once here for single writes, bulk loads and backfills alike
+APPEND_HABIT_CREATED_EVENTS = """
+INSERT INTO events (type, habit_id, payload)
+SELECT 'habit_created', id, json_object(
+    'name', name,
+    'description', description,
+    'periodicity', periodicity,
+    'start_date', start_date
+)
+FROM habits
+WHERE id >= ?
+ORDER BY id
+"""
+
+APPEND_COMPLETED_EVENTS = """
+INSERT INTO events (type, habit_id, completion_id, completion_date)
+SELECT 'completed', c.habit_id, c.id, c.completion_date
+FROM completions c
+JOIN habits h ON h.id = c.habit_id
+WHERE c.id >= ?
+ORDER BY c.id
+"""
+
+APPEND_DELETED_EVENT = """
+INSERT INTO events (type, habit_id) VALUES ('deleted', ?)
+"""
+
+APPEND_UNCOMPLETED_EVENT = """
+INSERT INTO events (type, habit_id, completion_id, completion_date)
+VALUES ('uncompleted', ?, ?, ?)
+"""
+
+SELECT_EVENTS_SINCE = """
+SELECT seq, type, habit_id, completion_id, completion_date, payload, recorded_at
+FROM events
+WHERE seq > ?
+ORDER BY seq
+LIMIT ?
+"""
+
+SELECT_ANY_EVENT = "SELECT 1 FROM events LIMIT 1"
+
+SELECT_MAX_EVENT_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM events"
+
+INSERT_CHECKPOINT = "INSERT INTO checkpoints (seq) VALUES (?)"
+
+SELECT_LAST_CHECKPOINT = "SELECT COALESCE(MAX(seq), 0) FROM checkpoints"
+
+# Replay of the events after a sequence number. Deletes are applied first,
+# as tombstones like live deletes; creations and completions are then only
+# applied when no later event deleted their habit (habit IDs can be reused
+# once a deleted habit is purged). Completion IDs can be reused as well, so
+# a completion and its removal only apply when no later event for the same
+# completion ID undoes them.
+REPLAY_DELETED_HABITS = """
+UPDATE habits SET deleted_at = CURRENT_TIMESTAMP, next_due_date = NULL
+WHERE deleted_at IS NULL AND id IN (
+    SELECT habit_id FROM events WHERE seq > ? AND type = 'deleted'
+)
+"""
+
+# Completions left over from before a reused habit ID was deleted. Other
+# deleted habits keep theirs until purged.
+REPLAY_DELETED_COMPLETIONS = """
+DELETE FROM completions WHERE habit_id IN (
+    SELECT d.habit_id FROM events d
+    WHERE d.seq > ? AND d.type = 'deleted'
+    AND EXISTS (
+        SELECT 1 FROM events c
+        WHERE c.habit_id = d.habit_id AND c.seq > d.seq
+        AND c.type = 'habit_created'
+    )
+)
+"""
+
+REPLAY_UNCOMPLETED = """
+DELETE FROM completions WHERE id IN (
+    SELECT u.completion_id FROM events u
+    WHERE u.seq > ? AND u.type = 'uncompleted'
+    AND NOT EXISTS (
+        SELECT 1 FROM events c
+        WHERE c.completion_id = u.completion_id AND c.seq > u.seq
+        AND c.type = 'completed'
+    )
+)
+"""
+
+REPLAY_HABIT_CREATED = """
+WITH last_deleted AS (
+    SELECT habit_id, MAX(seq) AS seq FROM events
+    WHERE seq > ?1 AND type = 'deleted'
+    GROUP BY habit_id
+)
+INSERT INTO habits (id, name, description, periodicity, start_date)
+SELECT
+    e.habit_id,
+    json_extract(e.payload, '$.name'),
+    json_extract(e.payload, '$.description'),
+    json_extract(e.payload, '$.periodicity'),
+    json_extract(e.payload, '$.start_date')
+FROM events e
+LEFT JOIN last_deleted d ON d.habit_id = e.habit_id
+WHERE e.seq > ?1 AND e.type = 'habit_created'
+AND (d.seq IS NULL OR d.seq < e.seq)
+ORDER BY e.seq
+ON CONFLICT(id) DO UPDATE SET
+    name = excluded.name,
+    description = excluded.description,
+    periodicity = excluded.periodicity,
+    start_date = excluded.start_date,
+    deleted_at = NULL
+"""
+
+REPLAY_COMPLETED = """
+WITH last_deleted AS (
+    SELECT habit_id, MAX(seq) AS seq FROM events
+    WHERE seq > ?1 AND type = 'deleted'
+    GROUP BY habit_id
+)
+INSERT OR REPLACE INTO completions (id, habit_id, completion_date)
+SELECT e.completion_id, e.habit_id, e.completion_date
+FROM events e
+LEFT JOIN last_deleted d ON d.habit_id = e.habit_id
+WHERE e.seq > ?1 AND e.type = 'completed'
+AND (d.seq IS NULL OR d.seq < e.seq)
+AND NOT EXISTS (
+    SELECT 1 FROM events u
+    WHERE u.completion_id = e.completion_id AND u.seq > e.seq
+    AND u.type = 'uncompleted'
+)
+ORDER BY e.seq
+"""
+
+CLEAR_COMPLETIONS = "DELETE FROM completions"
+
+CLEAR_HABITS = "DELETE FROM habits"
+
+# Rows left behind while foreign keys were not enforced
+DELETE_ORPHAN_COMPLETIONS = """
+DELETE FROM completions
+WHERE habit_id NOT IN (SELECT id FROM habits)
+"""
+
+DELETE_ORPHAN_DUE_NOTIFICATIONS = """
+DELETE FROM due_notifications
+WHERE habit_id NOT IN (SELECT id FROM habits)
+"""
+
+DELETE_ORPHAN_HABIT_TAGS = """
+DELETE FROM habit_tags
+WHERE habit_id NOT IN (SELECT id FROM habits)
+"""
+
+# -------------------------
+# Purging deleted habits
+# -------------------------
+
+SELECT_DELETED_HABIT_IDS = """
+SELECT id FROM habits WHERE deleted_at IS NOT NULL ORDER BY deleted_at, id
+"""
+
+# Bounded so each purge transaction holds the write lock only briefly
+DELETE_COMPLETIONS_CHUNK = """
+DELETE FROM completions WHERE id IN (
+    SELECT id FROM completions WHERE habit_id = ? LIMIT ?
+)
+"""
+
+PURGE_HABIT_BY_ID = "DELETE FROM habits WHERE id = ? AND deleted_at IS NOT NULL"
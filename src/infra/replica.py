@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.infra import database
+from src.infra import queries as q
+
+MEMORY = ":memory:"
+
+
+class SnapshotReplica:
+    """Read-only copy of the habits database taken with the SQLite backup API.
+
+    Each refresh copies the live database into a fresh target and swaps it in,
+    so readers keep a consistent snapshot while the next one is being taken
+    and never hold locks on the live file.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = MEMORY,
+        max_staleness: float = 60.0,
+        pages: int = -1,
+    ) -> None:
+        """
+        Args:
+            path (str | Path): Snapshot file, or ":memory:" to keep it in RAM
+            max_staleness (float): Seconds after which connection() refreshes
+            pages (int): Pages copied per backup step; -1 copies everything at
+                once, smaller values release the live database between steps
+        """
+        self.path = path
+        self.max_staleness = max_staleness
+        self.pages = pages
+        self._conn: sqlite3.Connection | None = None
+        self._refreshed_at: float | None = None
+        # Bumped on every refresh, so callers can tell snapshots apart
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last refresh, or None if never refreshed."""
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def refresh(self) -> None:
+        """Copies the live database into a new snapshot."""
+        with self._lock:
+            source = database.get_connection()
+            if self.path == MEMORY:
+                target = sqlite3.connect(MEMORY, check_same_thread=False)
+                source.backup(target, pages=self.pages)
+            else:
+                path = Path(self.path)
+                tmp_path = path.with_name(path.name + ".tmp")
+                target = sqlite3.connect(tmp_path)
+                source.backup(target, pages=self.pages)
+                target.close()
+                os.replace(tmp_path, path)
+                target = sqlite3.connect(
+                    f"file:{path}?mode=ro", uri=True, check_same_thread=False
+                )
+            target.execute(q.ENABLE_QUERY_ONLY)
+
+            # Readers still holding the old connection finish on the old snapshot
+            self._conn = target
+            self._refreshed_at = time.monotonic()
+            self.generation += 1
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the snapshot connection, refreshing it if it is too stale."""
+        age = self.age
+        if self._conn is None or age is None or age > self.max_staleness:
+            self.refresh()
+        assert self._conn is not None
+        return self._conn
+
+    def start(self, interval: float | None = None) -> None:
+        """Refreshes the snapshot periodically from a background thread."""
+        if self._thread is not None:
+            return
+        interval = interval if interval is not None else self.max_staleness
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._thread = threading.Thread(
+            target=run, name="snapshot-replica", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops background refreshing."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
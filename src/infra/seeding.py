@@ -0,0 +1,138 @@
+import random
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+from src.core.clock import get_clock
+from src.core.constants import PERIOD_DELTAS
+from src.core.model import Periodicity
+from src.infra import database
+from src.infra import queries as q
+from src.infra.database import (
+    append_created_events,
+    begin_write,
+    refresh_next_due_dates,
+)
+from src.infra.date_utils import get_period_delta
+
+HabitRow = tuple[int, str, str, Periodicity, str]
+
+
+def _rng(seed: int, habit_number: int, stream: str) -> random.Random:
+    # Independent generators per habit, so every habit is reproducible on its own
+    return random.Random(f"{seed}:{habit_number}:{stream}")
+
+
+def generate_habit_rows(
+    habit_count: int, first_id: int, years: int, seed: int, today: date
+) -> Iterator[HabitRow]:
+    """Yields deterministic habit rows (id, name, description, periodicity, start_date)."""
+    periods = list(PERIOD_DELTAS)
+    span = 365 * years
+
+    for n in range(habit_count):
+        rng = _rng(seed, n, "habit")
+        periodicity = rng.choice(periods)
+        start = today - timedelta(
+            days=span - rng.randrange(get_period_delta(periodicity))
+        )
+        yield (
+            first_id + n,
+            f"Habit {first_id + n}",
+            f"Synthetic {periodicity} habit",
+            periodicity,
+            start.isoformat(),
+        )
+
+
+def generate_completion_rows(
+    habits: list[HabitRow], miss_rate: float, seed: int, today: date
+) -> Iterator[tuple[int, str]]:
+    """Yields (habit_id, completion_date) rows, one per period unless missed."""
+    # Each date string is built once and shared by every habit
+    first_day = min(date.fromisoformat(h[4]) for h in habits).toordinal()
+    last_day = today.toordinal()
+    day_strings = [
+        date.fromordinal(o).isoformat() for o in range(first_day, last_day + 1)
+    ]
+
+    for n, (habit_id, _, _, periodicity, start_date) in enumerate(habits):
+        random_draw = _rng(seed, n, "completions").random
+        start = date.fromisoformat(start_date).toordinal() - first_day
+        gap = get_period_delta(periodicity)
+
+        for offset in range(start, last_day - first_day + 1, gap):
+            if random_draw() >= miss_rate:
+                yield habit_id, day_strings[offset]
+
+
+def seed_habits(
+    habit_count: int,
+    years: int = 1,
+    miss_rate: float = 0.1,
+    seed: int = 0,
+    today: date | None = None,
+) -> tuple[int, int]:
+    """Bulk-inserts a reproducible synthetic dataset.
+
+    Args:
+        habit_count (int): Number of habits to create
+        years (int): Length of each habit's completion history
+        miss_rate (float): Probability of skipping any single period
+        seed (int): Seed; the same arguments always produce the same data
+        today (date | None): Last day of the history (default: today)
+
+    Returns:
+        tuple[int, int]: Number of habits and completions inserted
+
+    Raises:
+        ValueError: If habit_count or years is less than 1
+
+    Note:
+        Rows are streamed from generators in a single transaction with
+        synchronous=OFF and the indexes dropped until the load is done, so a
+        crash midway can leave the database needing a restore.
+    """
+    if habit_count < 1:
+        raise ValueError("habit_count must be at least 1.")
+    if years < 1:
+        raise ValueError("years must be at least 1.")
+
+    today = today or get_clock().today()
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    synchronous = cursor.execute(q.SELECT_SYNCHRONOUS).fetchone()[0]
+
+    try:
+        cursor.execute(q.SET_SYNCHRONOUS[0])
+        begin_write(conn)
+
+        first_id = cursor.execute(q.SELECT_MAX_HABIT_ID).fetchone()[0] + 1
+        first_completion_id = (
+            cursor.execute(q.SELECT_MAX_COMPLETION_ID).fetchone()[0] + 1
+        )
+        habits = list(generate_habit_rows(habit_count, first_id, years, seed, today))
+
+        for statement in q.DROP_INDEXES:
+            cursor.execute(statement)
+
+        cursor.executemany(q.INSERT_HABIT_WITH_ID, habits)
+        cursor.executemany(
+            q.INSERT_COMPLETION,
+            generate_completion_rows(habits, miss_rate, seed, today),
+        )
+        completion_count = cursor.rowcount
+
+        for statement in q.CREATE_INDEXES:
+            cursor.execute(statement)
+        append_created_events(cursor, first_id, first_completion_id)
+        refresh_next_due_dates(cursor)
+
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute(q.SET_SYNCHRONOUS[synchronous])
+        database.release_connection(conn)
+
+    return len(habits), completion_count
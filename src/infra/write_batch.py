@@ -0,0 +1,79 @@
+import sqlite3
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+
+from src.infra import queries as q
+from src.infra.database import begin_write, deferred_commits
+
+
+class WriteBatch:
+    """Runs many database operations on one connection and transaction.
+
+    Each operation runs inside its own savepoint, so a failing one is undone
+    on its own without losing the others. The transaction is committed every
+    commit_every operations and when the batch closes.
+
+    Example:
+        with WriteBatch(commit_every=1000) as batch:
+            for completion in completions:
+                with batch.operation():
+                    tracker.complete_habit(completion["habit_id"])
+    """
+
+    def __init__(self, commit_every: int | None = None) -> None:
+        """
+        Args:
+            commit_every (int | None): Commit after this many successful
+                operations; None commits once, when the batch closes
+        """
+        self.commit_every = commit_every
+        self.succeeded = 0
+        self.failed = 0
+        self._conn: sqlite3.Connection | None = None
+        self._stack = ExitStack()
+        self._uncommitted = 0
+
+    def __enter__(self) -> "WriteBatch":
+        self._conn = self._stack.enter_context(deferred_commits())
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self._conn = None
+            self._stack.close()
+
+    @contextmanager
+    def operation(self) -> Iterator[None]:
+        """Runs the enclosed operation in a savepoint of the batch transaction.
+
+        Raises:
+            Exception: Whatever the operation raised, after undoing its writes
+        """
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("WriteBatch is not open.")
+
+        begin_write(conn)
+        conn.execute(q.SAVEPOINT_OPERATION)
+        try:
+            yield
+        except BaseException:
+            conn.execute(q.ROLLBACK_TO_OPERATION)
+            conn.execute(q.RELEASE_OPERATION)
+            self.failed += 1
+            raise
+        conn.execute(q.RELEASE_OPERATION)
+        self.succeeded += 1
+        self._uncommitted += 1
+
+        if self.commit_every and self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        """Commits every operation completed so far."""
+        if self._conn is not None:
+            self._conn.commit()
+            self._uncommitted = 0
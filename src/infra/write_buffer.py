@@ -0,0 +1,121 @@
+import threading
+
+from src.core.model import CreateCompletionBody
+from src.infra.database import add_completions, uses_memory_database
+
+
+class CompletionWriteBuffer:
+    """Queues completions in memory and writes them in group commits.
+
+    A background thread flushes the queue whenever it reaches ``max_batch``
+    entries or ``flush_interval`` seconds have passed, so a burst of
+    completions costs one commit instead of one per completion. Queued
+    completions are lost if the process dies before they are flushed.
+
+    Needs a database file: the writer thread commits on its own connection,
+    while an in-memory database has a single connection that the caller's
+    thread is using too.
+    """
+
+    def __init__(self, max_batch: int = 500, flush_interval: float = 0.05) -> None:
+        if uses_memory_database():
+            raise RuntimeError("Write buffer needs a database file, not :memory:.")
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: list[CreateCompletionBody] = []
+        # habit_id -> (latest unflushed completion date, enqueue sequence)
+        self._latest: dict[int, tuple[str, int]] = {}
+        self._seq = 0
+        self._error: Exception | None = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="completion-writer", daemon=True
+        )
+        self._thread.start()
+
+    def enqueue(self, completion: CreateCompletionBody) -> None:
+        """Queues a completion for the next group commit."""
+        self._raise_pending_error()
+        if self._closed:
+            raise RuntimeError("Write buffer is closed.")
+
+        with self._lock:
+            self._seq += 1
+            self._pending.append(completion)
+            habit_id = completion["habit_id"]
+            latest = self._latest.get(habit_id)
+            if latest is None or completion["completion_date"] >= latest[0]:
+                self._latest[habit_id] = (completion["completion_date"], self._seq)
+            full = len(self._pending) >= self.max_batch
+
+        if full:
+            self._wakeup.set()
+
+    def latest_pending_date(self, habit_id: int) -> str | None:
+        """Returns the latest completion date still waiting to be committed."""
+        with self._lock:
+            latest = self._latest.get(habit_id)
+        return latest[0] if latest else None
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Writes all queued completions in one commit.
+
+        Returns:
+            int: Number of completions written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                flushed_seq = self._seq
+
+            if not batch:
+                return 0
+
+            try:
+                add_completions(batch)
+            except Exception:
+                with self._lock:
+                    self._pending = batch + self._pending
+                raise
+
+            # Only forget entries that are now visible in the database
+            with self._lock:
+                for completion in batch:
+                    latest = self._latest.get(completion["habit_id"])
+                    if latest is not None and latest[1] <= flushed_seq:
+                        del self._latest[completion["habit_id"]]
+
+            return len(batch)
+
+    def close(self) -> None:
+        """Stops the background writer and flushes anything still queued."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self._raise_pending_error()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                self._error = e
+
+    def _raise_pending_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
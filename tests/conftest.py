@@ -1,24 +1,26 @@
-import sqlite3
 from typing import Unpack
 
 import pytest
 
+from src.core.clock import TZ_ENV_VAR, set_clock
 from src.core.model import CreateHabitBody
-from src.infra.database import init_db
+from src.infra.database import DB_ENV_VAR, configure_database, init_db
 
 
 @pytest.fixture(autouse=True)
 def setup_test_db(monkeypatch):
-    # Create a shared in-memory connection
-    connection = sqlite3.connect(":memory:")
-    # Patch get_connection to always return this shared connection
-    monkeypatch.setattr("src.infra.database.get_connection", lambda: connection)
-    # Initialize schema on this connection
+    # The CLI reads these on every invocation; never let a user's own
+    # database or time zone leak into the tests
+    monkeypatch.delenv(DB_ENV_VAR, raising=False)
+    monkeypatch.delenv(TZ_ENV_VAR, raising=False)
+    # Fresh in-memory database, held open for the duration of the test
+    configure_database(":memory:")
     init_db()
 
     yield
-    # Close the shared connection after all tests
-    connection.close()
+    # Close the in-memory connection and restore the default database and clock
+    configure_database()
+    set_clock(None)
 
 
 @pytest.fixture
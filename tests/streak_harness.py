@@ -0,0 +1,283 @@
+"""Differential testing of streak engines against a naive reference oracle.
+
+Every function registered with @streak_engine computes (current, longest)
+streaks for all habits in the configured database. check_engines() loads a
+randomized history, runs each engine and compares it habit by habit with
+reference_streaks(), which recomputes streaks from the periodicity rules
+directly by walking the calendar one day at a time, without the Cadence
+index arithmetic the engines share.
+
+To prove a new engine (SQL, vectorized, cached, ...) equivalent, register it
+here; tests/test_streak_engines.py and benchmarks/bench_streak_engines.py
+pick it up.
+"""
+
+import datetime
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from src.core.analytics import (
+    clear_cache,
+    get_habits,
+    get_longest_streak_by_id,
+    get_stats,
+    get_streak_by_habit_id,
+    stream_snapshot_streaks,
+)
+from src.infra.database import add_completion, add_completions, add_habit
+from src.infra.ordinal_snapshot import OrdinalSnapshot, export_ordinal_snapshot
+
+# habit_id -> (current streak, longest streak)
+Streaks = dict[int, tuple[int, int]]
+StreakEngine = Callable[[datetime.date], Streaks]
+
+STREAK_ENGINES: dict[str, StreakEngine] = {}
+
+# At least one spec of every kind, including steps and weekday sets that
+# put period boundaries on different days
+SPECS = [
+    "daily",
+    "weekly",
+    "biweekly",
+    "every:2",
+    "every:3",
+    "every:10",
+    "calendar-weekly",
+    "monthly",
+    "weekdays:mon",
+    "weekdays:mon,thu",
+    "weekdays:tue,wed,sat",
+    "weekdays:mon,tue,wed,thu,fri,sat,sun",
+]
+
+_WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+_ROLLING_DAYS = {"daily": 1, "weekly": 7, "biweekly": 14}
+
+
+def streak_engine(name: str) -> Callable[[StreakEngine], StreakEngine]:
+    """Registers a streak implementation for differential testing."""
+
+    def register(engine: StreakEngine) -> StreakEngine:
+        STREAK_ENGINES[name] = engine
+        return engine
+
+    return register
+
+
+@streak_engine("per-habit")
+def _per_habit(today: datetime.date) -> Streaks:
+    return {
+        h["id"]: (
+            get_streak_by_habit_id(h["id"], today),
+            get_longest_streak_by_id(h["id"]),
+        )
+        for h in get_habits()
+    }
+
+
+@streak_engine("stats")
+def _stats(today: datetime.date) -> Streaks:
+    return {
+        s["id"]: (s["current_streak"], s["longest_streak"]) for s in get_stats(today)
+    }
+
+
+@streak_engine("ordinal-snapshot")
+def _ordinal_snapshot(today: datetime.date) -> Streaks:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "streaks.ord"
+        export_ordinal_snapshot(path)
+        with OrdinalSnapshot(path) as snapshot:
+            return {
+                s["id"]: (s["streak"], s["longest_streak"])
+                for s in stream_snapshot_streaks(snapshot, today)
+            }
+
+
+# -------------------------
+# Reference oracle
+# -------------------------
+
+
+def _rule(spec: str) -> tuple[int, Callable[[datetime.date], bool]]:
+    """Step and "does a new period start on this day" for a periodicity spec."""
+    kind, _, arg = spec.partition(":")
+    if spec in _ROLLING_DAYS:
+        return _ROLLING_DAYS[spec], lambda day: True
+    if kind == "every":
+        return int(arg), lambda day: True
+    if spec == "calendar-weekly":
+        return 1, lambda day: day.weekday() == 0
+    if spec == "monthly":
+        return 1, lambda day: day.day == 1
+    if kind == "weekdays":
+        scheduled = {_WEEKDAYS.index(name) for name in arg.split(",")}
+        return 1, lambda day: day.weekday() in scheduled
+    raise ValueError(spec)
+
+
+def _linked(
+    starts_period: Callable[[datetime.date], bool],
+    step: int,
+    earlier: datetime.date,
+    later: datetime.date,
+) -> bool:
+    """Whether later is no more than step new periods after earlier."""
+    boundaries = 0
+    day = earlier
+    while day < later:
+        day += datetime.timedelta(days=1)
+        boundaries += starts_period(day)
+        if boundaries > step:
+            return False
+    return True
+
+
+def reference_streaks(
+    spec: str, dates: list[datetime.date], today: datetime.date
+) -> tuple[int, int]:
+    """Current and longest streak of one habit, straight from the rules.
+
+    Every completion counts, duplicates included. Consecutive completions
+    belong to the same streak when no more than step new periods begin
+    between them; the latest streak is current while that still holds for
+    today.
+    """
+    step, starts_period = _rule(spec)
+    runs = []
+    for prev, day in zip([None] + sorted(dates), sorted(dates)):
+        if prev is not None and _linked(starts_period, step, prev, day):
+            runs[-1] += 1
+        else:
+            runs.append(1)
+
+    if not runs:
+        return 0, 0
+    current = runs[-1] if _linked(starts_period, step, max(dates), today) else 0
+    return current, max(runs)
+
+
+# -------------------------
+# Randomized histories
+# -------------------------
+
+
+def _last_linked_day(spec: str, day: datetime.date) -> datetime.date:
+    """Latest day a completion after day still continues its streak."""
+    step, starts_period = _rule(spec)
+    boundaries = 0
+    while True:
+        following = day + datetime.timedelta(days=1)
+        boundaries += starts_period(following)
+        if boundaries > step:
+            return day
+        day = following
+
+
+def random_history(
+    rng: random.Random, spec: str, start: datetime.date, today: datetime.date
+) -> list[datetime.date]:
+    """Completion dates from start up to today, in random (insertion) order.
+
+    Gaps mix duplicates, short gaps, the last day that keeps the streak, the
+    first day that breaks it and long breaks, so every engine is exercised
+    on both sides of each period boundary.
+    """
+    dates = []
+    day = start + datetime.timedelta(days=rng.randrange(7))
+    while day <= today:
+        dates.append(day)
+        edge = _last_linked_day(spec, day)
+        choice = rng.random()
+        if choice < 0.05:
+            continue  # duplicate date
+        elif choice < 0.45:
+            day = edge
+        elif choice < 0.6:
+            day = edge + datetime.timedelta(days=1)
+        elif choice < 0.9:
+            day += datetime.timedelta(days=rng.randint(1, max((edge - day).days, 1)))
+        else:
+            day = edge + datetime.timedelta(days=rng.randint(2, 90))
+    rng.shuffle(dates)
+    return dates
+
+
+def load_random_histories(
+    habit_count: int, years: int, today: datetime.date, seed: int = 0
+) -> dict[int, tuple[str, list[datetime.date]]]:
+    """Creates habits with randomized histories in the configured database.
+
+    Completions are inserted out of date order, partly one at a time and
+    partly in bulk chunks. Some habits never get a completion.
+
+    Returns:
+        dict[int, tuple[str, list[date]]]: Spec and completion dates per habit ID
+    """
+    rng = random.Random(seed)
+    histories = {}
+    pending = []
+    for i in range(habit_count):
+        spec = SPECS[i % len(SPECS)]
+        start = today - datetime.timedelta(days=rng.randrange(1, 365 * years + 1))
+        habit_id = add_habit(
+            {
+                "name": f"Habit {i}",
+                "periodicity": spec,
+                "start_date": start.isoformat(),
+            }
+        )
+        assert habit_id is not None
+        dates = [] if rng.random() < 0.05 else random_history(rng, spec, start, today)
+        histories[habit_id] = (spec, dates)
+        pending += [(habit_id, day) for day in dates]
+
+    rng.shuffle(pending)
+    for habit_id, day in pending[:50]:
+        add_completion({"habit_id": habit_id, "completion_date": day.isoformat()})
+    for first in range(50, len(pending), 5000):
+        add_completions(
+            [
+                {"habit_id": habit_id, "completion_date": day.isoformat()}
+                for habit_id, day in pending[first : first + 5000]
+            ]
+        )
+    return histories
+
+
+def check_engines(
+    histories: dict[int, tuple[str, list[datetime.date]]], today: datetime.date
+) -> dict[str, float]:
+    """Runs every registered engine and compares it with the oracle.
+
+    Returns:
+        dict[str, float]: Seconds each engine took, caches cleared beforehand
+
+    Raises:
+        AssertionError: Listing the first habits an engine got wrong
+    """
+    expected = {
+        habit_id: reference_streaks(spec, dates, today)
+        for habit_id, (spec, dates) in histories.items()
+    }
+
+    timings = {}
+    for name, engine in STREAK_ENGINES.items():
+        clear_cache()
+        start = time.perf_counter()
+        actual = engine(today)
+        timings[name] = time.perf_counter() - start
+
+        wrong = [
+            f"habit {habit_id} ({histories[habit_id][0]}): "
+            f"expected {expected[habit_id]}, got {actual.get(habit_id)}"
+            for habit_id in expected
+            if actual.get(habit_id) != expected[habit_id]
+        ]
+        assert (
+            not wrong and actual.keys() == expected.keys()
+        ), f"{name} disagrees with the reference oracle:\n" + "\n".join(wrong[:10])
+    return timings
@@ -1,13 +1,31 @@
 import datetime
+import sqlite3
 
+import pytest
+
+from src.core import analytics
 from src.core.analytics import (
+    get_due_habits,
+    get_group_stats,
+    get_habits,
     get_habits_by_period,
     get_longest_streak_by_id,
+    get_stats,
     get_streak_by_habit_id,
     get_streaks,
+    stream_habits,
+    use_snapshot,
 )
+from src.core.habit_tracker import HabitTracker
 from src.core.model import CreateHabitBody
-from src.infra.database import add_completion, add_habit
+from src.infra.database import (
+    add_completion,
+    add_habit,
+    add_habit_tags,
+    configure_database,
+    init_db,
+)
+from src.infra.replica import SnapshotReplica
 
 
 def test_get_habits_by_period(habit_factory):
@@ -141,3 +159,189 @@ def test_get_streaks(habit_factory):
     assert (
         streak_map[habit_id2] == 0
     ), f"Habit B should have streak 0, got {streak_map[habit_id2]}"
+
+
+def test_analytics_read_from_snapshot(habit_factory, tmp_path):
+    """Route analytics to a snapshot that only changes when refreshed."""
+    add_habit(habit_factory(name="Before snapshot"))
+
+    for path in [":memory:", tmp_path / "snapshot.db"]:
+        replica = SnapshotReplica(path, max_staleness=3600)
+        use_snapshot(replica)
+        try:
+            initial_count = len(get_habits())
+
+            # Writes to the live database are not visible until a refresh
+            add_habit(habit_factory(name="After snapshot"))
+            assert len(get_habits()) == initial_count, "Snapshot should be stale"
+
+            replica.refresh()
+            assert len(get_habits()) == initial_count + 1, "Refresh not applied"
+        finally:
+            use_snapshot(None)
+
+
+def test_streaming_from_snapshot_leaves_caller_on_live_database(habit_factory):
+    """Only the stream itself reads the snapshot, not the code consuming it."""
+    habit_id = add_habit(habit_factory())
+    tracker = HabitTracker()
+    use_snapshot(SnapshotReplica(":memory:", max_staleness=3600))
+    try:
+        for habit in stream_habits():
+            assert habit["id"] == habit_id
+            tracker.complete_habit(habit_id)
+            # The snapshot predates the first completion; the live check must not
+            with pytest.raises(ValueError):
+                tracker.complete_habit(habit_id)
+    finally:
+        use_snapshot(None)
+
+
+def test_get_due_habits(habit_factory):
+    """Report habits whose streak breaks unless completed within the window."""
+    today = datetime.date.today()
+
+    def completed_days_ago(name, periodicity, days):
+        habit_id = add_habit(habit_factory(name=name, periodicity=periodicity))
+        assert habit_id is not None
+        completion_date = (today - datetime.timedelta(days=days)).isoformat()
+        add_completion({"habit_id": habit_id, "completion_date": completion_date})
+        return habit_id
+
+    due_today = completed_days_ago("Due today", "daily", 1)
+    due_in_two_days = completed_days_ago("Due in two days", "weekly", 5)
+    completed_days_ago("Already broken", "daily", 3)
+    add_habit(habit_factory(name="Never completed"))
+
+    assert [h["id"] for h in get_due_habits()] == [due_today]
+    assert [h["id"] for h in get_due_habits(3)] == [due_today, due_in_two_days]
+
+    # Changed-only mode reports each due date once
+    assert [h["id"] for h in get_due_habits(3, changed_only=True)] == [
+        due_today,
+        due_in_two_days,
+    ]
+    assert get_due_habits(3, changed_only=True) == []
+
+    # Completing moves the due date out of the window
+    add_completion({"habit_id": due_today, "completion_date": today.isoformat()})
+    assert [h["id"] for h in get_due_habits()] == []
+
+
+def test_get_stats(habit_factory):
+    """Compute rates, gaps, breaks and streaks for all habits in one pass."""
+    habit_id = add_habit(habit_factory(start_date="2025-01-01"))
+    empty_id = add_habit(habit_factory(name="Never completed"))
+    assert habit_id is not None and empty_id is not None
+
+    for day in [1, 2, 3, 5, 6, 7]:
+        add_completion({"habit_id": habit_id, "completion_date": f"2025-01-{day:02d}"})
+
+    stats = {s["id"]: s for s in get_stats(today=datetime.date(2025, 1, 10))}
+
+    habit_stats = stats[habit_id]
+    assert habit_stats["completions"] == 6
+    assert habit_stats["completion_rate"] == 0.6  # 6 of 10 days
+    # The window is clipped to the 10 days since the habit started
+    assert habit_stats["rolling_4_week_rate"] == 0.6
+    assert habit_stats["mean_gap"] == 1.2  # gaps 1, 1, 2, 1, 1
+    assert habit_stats["median_gap"] == 1
+    assert habit_stats["breaks"] == 1
+    assert habit_stats["current_streak"] == 0
+    assert habit_stats["longest_streak"] == get_longest_streak_by_id(habit_id) == 3
+
+    empty_stats = stats[empty_id]
+    assert empty_stats["completions"] == 0
+    assert empty_stats["mean_gap"] is None and empty_stats["median_gap"] is None
+    assert empty_stats["longest_streak"] == 0
+
+
+def test_rolling_rate_of_a_new_habit(habit_factory):
+    """A habit kept every day since it started a week ago is on track."""
+    habit_id = add_habit(habit_factory(start_date="2025-01-04"))
+    assert habit_id is not None
+    # Logged before the start date, so outside the window
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+    for day in range(4, 11):
+        add_completion({"habit_id": habit_id, "completion_date": f"2025-01-{day:02d}"})
+
+    [stats] = get_stats(today=datetime.date(2025, 1, 10))
+    assert stats["rolling_4_week_rate"] == 1.0
+
+
+def test_get_group_stats(habit_factory):
+    """Aggregate completion rate and active streaks over a tag's habits."""
+    lapsed = add_habit(habit_factory(start_date="2025-01-01"))
+    active = add_habit(habit_factory(start_date="2025-01-06"))
+    other = add_habit(habit_factory(start_date="2025-01-01"))
+    assert lapsed is not None and active is not None and other is not None
+    add_habit_tags(lapsed, ["team"])
+    add_habit_tags(active, ["team", "programme"])
+    add_habit_tags(other, ["programme"])
+
+    for day in [1, 2, 3, 5, 6, 7]:
+        add_completion({"habit_id": lapsed, "completion_date": f"2025-01-{day:02d}"})
+    for day in range(6, 11):
+        add_completion({"habit_id": active, "completion_date": f"2025-01-{day:02d}"})
+
+    stats = get_group_stats("team", today=datetime.date(2025, 1, 10))
+    assert stats == {
+        "tag": "team",
+        "habits": 2,
+        "active_streaks": 1,
+        "completions": 11,
+        "completion_rate": 11 / 15,  # 6 of 10 days and 5 of 5 days
+    }
+    assert get_group_stats("nobody")["habits"] == 0
+
+
+def test_memoized_results_follow_writes(habit_factory, monkeypatch):
+    """Reuse analytics results until a write changes the data version."""
+    habit_id = add_habit(habit_factory())
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+
+    calls = []
+    query = analytics.query_completion_dates_by_habit_id
+    monkeypatch.setattr(
+        analytics,
+        "query_completion_dates_by_habit_id",
+        lambda *args: calls.append(args) or query(*args),
+    )
+
+    assert get_longest_streak_by_id(habit_id) == 1
+    assert get_longest_streak_by_id(habit_id) == 1
+    assert len(calls) == 1, "Second call should be served from the cache"
+
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-02"})
+    assert get_longest_streak_by_id(habit_id) == 2
+    assert len(calls) == 2
+
+
+def test_memoized_results_see_other_connections(habit_factory, tmp_path):
+    """Invalidate cached results when another connection commits."""
+    path = tmp_path / "habits.db"
+    configure_database(path)
+    init_db()
+    add_habit(habit_factory())
+    assert len(get_habits()) == 1
+
+    other = sqlite3.connect(path)
+    with other:
+        other.execute(
+            "INSERT INTO habits (name, periodicity, start_date) VALUES (?, ?, ?)",
+            ("From elsewhere", "daily", "2025-01-01"),
+        )
+    other.close()
+
+    assert len(get_habits()) == 2
+
+
+def test_memoized_results_are_bounded(habit_factory, monkeypatch):
+    """Evict the least recently used result once the cache is full."""
+    monkeypatch.setattr(analytics, "ANALYTICS_CACHE_SIZE", 2)
+    habit_ids = [add_habit(habit_factory()) for _ in range(3)]
+    for habit_id in habit_ids:
+        get_longest_streak_by_id(habit_id)
+
+    cached_ids = [key[1][0] for key in analytics._cache]
+    assert cached_ids == habit_ids[1:]
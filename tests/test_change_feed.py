@@ -0,0 +1,36 @@
+from src.core.change_feed import get_changes, iter_changes
+from src.infra.database import add_completion, add_habit, delete_habit_by_id
+
+
+def test_get_changes_since_cursor(habit_factory):
+    """Return only changes after the cursor, in commit order."""
+    habit_id = add_habit(habit_factory(name="Feed"))
+    assert habit_id is not None
+    cursor = get_changes()[-1]["seq"]
+
+    completion_id = add_completion(
+        {"habit_id": habit_id, "completion_date": "2025-01-01"}
+    )
+    delete_habit_by_id(habit_id)
+
+    changes = get_changes(since=cursor)
+    assert [c["type"] for c in changes] == ["completed", "deleted"]
+    assert changes[0]["completion_id"] == completion_id
+    assert changes[0]["completion_date"] == "2025-01-01"
+    assert all(c["habit_id"] == habit_id for c in changes)
+    assert changes[0]["seq"] < changes[1]["seq"]
+
+    assert get_changes(since=changes[-1]["seq"]) == []
+
+
+def test_iter_changes_pages_and_follows(habit_factory):
+    """Page through the whole log, then pick up new changes while following."""
+    for n in range(5):
+        add_habit(habit_factory(name=f"Habit {n}"))
+
+    created = list(iter_changes(batch_size=2))
+    assert [c["habit"]["name"] for c in created] == [f"Habit {n}" for n in range(5)]
+
+    feed = iter_changes(since=created[-1]["seq"], follow=True, poll_interval=0)
+    add_habit(habit_factory(name="Late"))
+    assert next(feed)["habit"]["name"] == "Late"
@@ -1,8 +1,21 @@
+import csv
+import io
+import json
+
+import pytest
 from click.testing import CliRunner
 
 from src.cli import cli
 
 
+def create_daily_habit(runner: CliRunner, name: str, *options: str) -> int:
+    """Create a daily habit and return its ID, read from the JSON output"""
+    result = runner.invoke(
+        cli, ["create", name, "--periodicity", "daily", *options, "--format", "json"]
+    )
+    return json.loads(result.stdout)["id"]
+
+
 def test_create_habit_minimal():
     """Should create a new habit with minimal valid input"""
     runner = CliRunner()
@@ -27,6 +40,15 @@ def test_create_habit_invalid_periodicity():
     assert "invalid value for '--periodicity'" in result.output.lower()
 
 
+@pytest.mark.parametrize("option", ["--habits", "--years"])
+def test_seed_rejects_non_positive_sizes(option):
+    """Should reject seeding no habits or no history"""
+    runner = CliRunner()
+    result = runner.invoke(cli, ["seed", option, "0"])
+    assert result.exit_code != 0
+    assert f"invalid value for '{option}'" in result.output.lower()
+
+
 def test_list_habits_shows_created():
     """Should display habit in list after creation"""
     runner = CliRunner()
@@ -41,7 +63,7 @@ def test_complete_habit_requires_valid_id():
 
     # Create habit
     create_result = runner.invoke(cli, ["create", "Running", "--periodicity", "daily"])
-    habit_id = int(create_result.output.strip().split()[-1])
+    habit_id = int(create_result.stdout.strip().split()[-1])
 
     # Complete habit
     complete_result = runner.invoke(cli, ["complete", str(habit_id)])
@@ -60,7 +82,7 @@ def test_delete_habit_removes_it():
     create_result = runner.invoke(
         cli, ["create", "Sleep Early", "--periodicity", "daily"]
     )
-    habit_id = int(create_result.output.strip().split()[-1])
+    habit_id = int(create_result.stdout.strip().split()[-1])
 
     delete_result = runner.invoke(cli, ["delete", str(habit_id)])
     assert delete_result.exit_code == 0
@@ -76,3 +98,245 @@ def test_delete_habit_invalid_id():
     result = runner.invoke(cli, ["delete", "99999"])
     assert result.exit_code != 0
     assert "not found" in result.output.lower()
+
+
+def test_db_option_uses_in_memory_database():
+    """Should run against the database given with --db without touching disk"""
+    runner = CliRunner()
+    db = "file:cli-scratch?mode=memory&cache=shared"
+    runner.invoke(cli, ["--db", db, "create", "Scratch", "--periodicity", "daily"])
+    result = runner.invoke(cli, ["--db", db, "list"])
+    assert result.exit_code == 0
+    assert "scratch" in result.output.lower()
+
+
+def test_due_rejects_invalid_window():
+    """Should reject a --within value that is not a duration"""
+    runner = CliRunner()
+    result = runner.invoke(cli, ["due", "--within", "soon"])
+    assert result.exit_code != 0
+    assert "invalid value for '--within'" in result.output.lower()
+
+
+def test_list_habits_machine_readable_formats():
+    """Should emit the same habits as json, jsonl and csv"""
+    runner = CliRunner()
+    runner.invoke(cli, ["create", "Stretch", "--periodicity", "daily"])
+
+    json_result = runner.invoke(cli, ["list", "--format", "json"])
+    habits = json.loads(json_result.stdout)
+    assert "Stretch" in [h["name"] for h in habits]
+
+    jsonl_result = runner.invoke(cli, ["list", "--format", "jsonl"])
+    lines = jsonl_result.stdout.strip().splitlines()
+    assert [json.loads(line) for line in lines] == habits
+
+    csv_result = runner.invoke(cli, ["list", "--format", "csv"])
+    rows = list(csv.DictReader(io.StringIO(csv_result.stdout)))
+    assert [int(row["id"]) for row in rows] == [h["id"] for h in habits]
+
+
+def test_single_result_commands_emit_json():
+    """Should report create/complete results as JSON objects"""
+    runner = CliRunner()
+    created = runner.invoke(
+        cli, ["create", "Walk", "--periodicity", "daily", "--format", "json"]
+    )
+    habit_id = json.loads(created.stdout)["id"]
+
+    completed = runner.invoke(cli, ["complete", str(habit_id), "--format", "json"])
+    assert json.loads(completed.stdout)["habit_id"] == habit_id
+
+    streak = runner.invoke(cli, ["longest-streak", str(habit_id), "--format", "jsonl"])
+    assert json.loads(streak.stdout) == {"id": habit_id, "longest_streak": 1}
+
+
+def test_today_option_backdates_commands():
+    """Should record completions and compute streaks for the given day"""
+    runner = CliRunner()
+    created = runner.invoke(
+        cli,
+        ["--today", "2025-01-01", "create", "Walk", "--periodicity", "daily"]
+        + ["--format", "json"],
+    )
+    habit_id = json.loads(created.stdout)["id"]
+
+    for day in ["2025-01-01", "2025-01-02"]:
+        result = runner.invoke(cli, ["--today", day, "complete", str(habit_id)])
+        assert result.exit_code == 0, result.output
+
+    habits = json.loads(runner.invoke(cli, ["list", "--format", "json"]).stdout)
+    assert {"id": habit_id, "start_date": "2025-01-01"}.items() <= next(
+        h for h in habits if h["id"] == habit_id
+    ).items()
+
+    streaks = runner.invoke(
+        cli, ["--today", "2025-01-02", "streaks", "--format", "json"]
+    ).stdout
+    assert {"id": habit_id, "streak": 2} in json.loads(streaks)
+
+
+def test_invalid_time_zone():
+    """Should reject unknown time zones"""
+    result = CliRunner().invoke(cli, ["--tz", "Nowhere/Special", "list"])
+    assert result.exit_code != 0
+    assert "unknown time zone" in result.output.lower()
+
+
+def test_batch_runs_commands_from_stdin():
+    """Should run CLI-syntax and JSON lines in one process"""
+    runner = CliRunner()
+    habit_id = create_daily_habit(runner, "Morning run", "--start-date", "2025-01-01")
+    script = "\n".join(
+        [
+            "# provisioning",
+            'create "Evening walk" --periodicity daily',
+            f'["--today", "2025-01-01", "complete", "{habit_id}"]',
+            f'{{"command": "complete", "habit_id": {habit_id}, "today": "2025-01-02"}}',
+            f"./habit --today 2025-01-02 longest-streak {habit_id}",
+        ]
+    )
+    result = runner.invoke(cli, ["batch", "--format", "jsonl"], input=script)
+
+    assert result.exit_code == 0, result.output
+    created, first, second, streak = map(json.loads, result.stdout.splitlines())
+    assert created["id"] > habit_id
+    assert first["habit_id"] == second["habit_id"] == habit_id
+    assert second["completion_id"] > first["completion_id"]
+    assert streak == {"id": habit_id, "longest_streak": 2}
+
+
+def test_batch_reports_failed_lines():
+    """Should skip failing lines, report them by line number and exit non-zero"""
+    runner = CliRunner()
+    script = "\n".join(["complete 999", "bogus", "create Walk --periodicity daily"])
+    result = runner.invoke(cli, ["batch", "--format", "json"], input=script)
+
+    assert result.exit_code == 1
+    assert "Line 1: aborted" in result.stderr
+    assert "Line 2: No such command 'bogus'." in result.stderr
+    created = json.loads(result.stdout.splitlines()[-1])["id"]
+    listed = json.loads(runner.invoke(cli, ["list", "--format", "json"]).stdout)
+    assert [h["name"] for h in listed if h["id"] == created] == ["Walk"]
+
+
+def test_batch_rejects_commands_that_cannot_share_its_transaction():
+    """Should refuse seed and compact up front and run the remaining lines"""
+    runner = CliRunner()
+    script = "\n".join(
+        ["seed --habits 2", "compact", "create Walk --periodicity daily"]
+    )
+    result = runner.invoke(cli, ["batch", "--format", "jsonl"], input=script)
+
+    assert result.exit_code == 1
+    assert "Line 1: 'seed' cannot run inside a batch." in result.stderr
+    assert "Line 2: 'compact' cannot run inside a batch." in result.stderr
+    [created] = map(json.loads, result.stdout.splitlines())
+    assert created.keys() == {"id"}
+
+
+def test_create_with_blank_tag_stores_nothing():
+    """Should reject a blank tag before the habit is created"""
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["create", "Walk", "--periodicity", "daily", "--tag", " "]
+    )
+    assert result.exit_code != 0
+    assert "Tags cannot be blank." in result.stderr
+
+    listed = runner.invoke(cli, ["list", "--format", "json"])
+    assert "Walk" not in [h["name"] for h in json.loads(listed.stdout)]
+
+
+def test_batch_json_lines_expand_lists():
+    """Should pass JSON list values as one argument or option per item"""
+    runner = CliRunner()
+    habit_id = create_daily_habit(runner, "Read")
+    script = "\n".join(
+        [
+            '{"command": "create", "name": "Walk", "periodicity": "daily",'
+            ' "tag": ["team", "health"]}',
+            f'{{"command": "tag", "habit_id": {habit_id}, "tags": ["p", "q"]}}',
+        ]
+    )
+    result = runner.invoke(cli, ["batch", "--format", "jsonl"], input=script)
+    assert result.exit_code == 0, result.output
+    created = json.loads(result.stdout.splitlines()[0])["id"]
+
+    tagged = {"team": created, "health": created, "p": habit_id, "q": habit_id}
+    for tag, expected in tagged.items():
+        listed = runner.invoke(cli, ["list", "--tag", tag, "--format", "json"])
+        assert [h["id"] for h in json.loads(listed.stdout)] == [expected]
+
+
+def test_errors_stay_out_of_machine_readable_output():
+    """Should write error messages to stderr so stdout stays parseable"""
+    runner = CliRunner()
+    script = "\n".join(["complete 999", "create Walk --periodicity daily"])
+    result = runner.invoke(cli, ["batch", "--format", "jsonl"], input=script)
+
+    [created] = map(json.loads, result.stdout.splitlines())
+    assert created.keys() == {"id"}
+    assert "Error: Habit with id 999 not found." in result.stderr
+
+
+def test_batch_rejects_help_and_keeps_earlier_commands():
+    """Should report --help as a failed line, keep stdout clean and commit the rest"""
+    runner = CliRunner()
+    script = "\n".join(
+        [
+            "create Walk --periodicity daily",
+            "create Read --periodicity daily",
+            "list --help",
+        ]
+    )
+    result = runner.invoke(cli, ["batch", "--format", "jsonl"], input=script)
+
+    assert result.exit_code == 1
+    assert "Line 3: --help cannot be used inside a batch." in result.stderr
+    assert [json.loads(line).keys() for line in result.stdout.splitlines()] == [
+        {"id"},
+        {"id"},
+    ]
+    listed = runner.invoke(cli, ["list", "--format", "json"])
+    assert [h["name"] for h in json.loads(listed.stdout)][-2:] == ["Walk", "Read"]
+
+
+def test_complete_with_date_and_uncomplete():
+    """Should backdate completions and remove them again"""
+    runner = CliRunner()
+    habit_id = str(create_daily_habit(runner, "Walk"))
+
+    result = runner.invoke(cli, ["complete", habit_id, "--date", "2025-01-01"])
+    assert result.exit_code == 0, result.output
+    twice = runner.invoke(cli, ["complete", habit_id, "--date", "2025-01-01"])
+    assert "same period" in twice.output
+
+    removed = runner.invoke(cli, ["uncomplete", habit_id, "--date", "2025-01-01"])
+    assert removed.exit_code == 0
+    assert "removed" in removed.output.lower()
+
+    missing = runner.invoke(cli, ["uncomplete", habit_id, "--date", "2025-01-01"])
+    assert missing.exit_code != 0
+    assert "no completion on 2025-01-01" in missing.output.lower()
+
+
+def test_list_and_group_stats_by_tag():
+    """Should filter habits by tag and aggregate stats over the group"""
+    runner = CliRunner()
+    walk = str(create_daily_habit(runner, "Walk", "--tag", "team"))
+    read = str(create_daily_habit(runner, "Read"))
+    assert runner.invoke(cli, ["tag", read, "team", "reading"]).exit_code == 0
+
+    result = runner.invoke(cli, ["list", "--tag", "team", "--format", "json"])
+    assert [h["name"] for h in json.loads(result.stdout)] == ["Walk", "Read"]
+
+    runner.invoke(cli, ["complete", walk])
+    result = runner.invoke(cli, ["group-stats", "team", "--format", "json"])
+    assert result.exit_code == 0, result.output
+    stats = json.loads(result.stdout)
+    assert (stats["habits"], stats["active_streaks"]) == (2, 1)
+
+    assert runner.invoke(cli, ["untag", read, "team"]).exit_code == 0
+    result = runner.invoke(cli, ["list", "--tag", "team", "--format", "json"])
+    assert [h["name"] for h in json.loads(result.stdout)] == ["Walk"]
@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+from src.core.clock import FixedClock, SystemClock, get_clock, set_clock
+from src.core.analytics import get_habits
+from src.core.constants import get_today_date_string
+from src.infra.database import query_completions_by_habit_id
+from src.infra.initialization import init_app
+
+
+def test_system_clock_uses_time_zone():
+    """Report today's date in the requested zone."""
+    # UTC+12 is always exactly one calendar day ahead of UTC-12
+    ahead = SystemClock("Etc/GMT-12").today()
+    behind = SystemClock("Etc/GMT+12").today()
+    assert ahead - behind == datetime.timedelta(days=1)
+
+    with pytest.raises(ValueError):
+        SystemClock("Nowhere/Special")
+
+
+def test_default_clock_drives_today():
+    """Use the process-wide clock wherever today's date is needed."""
+    set_clock(FixedClock("2024-02-28"))
+    assert get_today_date_string() == "2024-02-28"
+
+    clock = get_clock()
+    assert isinstance(clock, FixedClock)
+    assert clock.advance() == datetime.date(2024, 2, 29)
+    assert get_today_date_string() == "2024-02-29"
+
+    set_clock(None)
+    assert isinstance(get_clock(), SystemClock)
+
+
+def test_sample_habits_follow_the_clock():
+    """Seed the sample habits relative to the clock, not the import date."""
+    set_clock(FixedClock("2024-02-28"))
+    init_app()
+
+    habits = get_habits()
+    assert {h["start_date"] for h in habits} == {"2024-02-28"}
+    latest = max(
+        c["completion_date"] for c in query_completions_by_habit_id(habits[0]["id"])
+    )
+    assert latest == "2024-02-28"
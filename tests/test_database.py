@@ -1,9 +1,15 @@
 from src.core.model import CreateHabitBody
+from src.infra.dao import HabitDAO
 from src.infra.database import (
+    DB_ENV_VAR,
     add_completion,
     add_habit,
+    configure_database,
     delete_habit_by_id,
+    get_connection,
+    init_db,
     query_completions_by_habit_id,
+    query_due_habits,
     query_habit_by_id,
     query_habits,
     query_habits_by_period,
@@ -116,3 +122,98 @@ def test_add_and_retrieve_completion(habit_factory) -> None:
     assert latest_completion is not None, "Should find latest completion"
     assert latest_completion["completion_date"] == completion_date
     assert latest_completion["habit_id"] == habit_id
+
+
+def test_configure_database_from_env(monkeypatch, habit_factory):
+    """Test that HABIT_DB selects the database when no path is given"""
+    monkeypatch.setenv(DB_ENV_VAR, ":memory:")
+    configure_database()
+    init_db()
+
+    assert query_habits() == [], "Should start from an empty database"
+    habit_id = add_habit(habit_factory())
+    assert query_habit_by_id(habit_id) is not None, "Connection was not held"
+
+
+def test_dao_matches_query_functions(habit_factory):
+    """Test that HabitDAO returns the same rows as the query functions"""
+    habit_id = add_habit(habit_factory())
+    assert habit_id is not None
+    for completion_date in ["2025-01-02", "2025-01-01", "2025-01-03"]:
+        add_completion({"habit_id": habit_id, "completion_date": completion_date})
+
+    dao = HabitDAO()
+    assert dao.habit_by_id(habit_id) == query_habit_by_id(habit_id)
+    assert dao.habits() == query_habits()
+    for order in ("ASC", "DESC"):
+        assert dao.completions_by_habit_id(
+            habit_id, order
+        ) == query_completions_by_habit_id(habit_id, order)
+    assert dao.latest_completion_by_habit_id(
+        habit_id
+    ) == query_latest_completion_by_habit_id(habit_id)
+    assert dao.habit_by_id(999999) is None
+    dao.close()
+
+
+def test_init_db_backfills_next_due_date():
+    """Test that databases without next_due_date are migrated and backfilled"""
+    configure_database("file:legacy?mode=memory&cache=shared")
+    conn = get_connection()
+    conn.execute(
+        "CREATE TABLE habits (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+        "description TEXT, periodicity TEXT NOT NULL, start_date TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO habits VALUES (1, 'Old', '', 'weekly', '2025-01-01')")
+    conn.execute(
+        "CREATE TABLE completions (id INTEGER PRIMARY KEY, "
+        "habit_id INTEGER NOT NULL, completion_date TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO completions VALUES (1, 1, '2025-01-03')")
+
+    init_db()
+
+    due = query_due_habits("2025-01-01", "2025-12-31")
+    assert [h["next_due_date"] for h in due] == ["2025-01-10"]
+
+
+def test_init_db_stops_id_reuse_in_older_databases(habit_factory):
+    """Test that older tables are rebuilt so purged IDs are never reissued"""
+    configure_database("file:legacy-ids?mode=memory&cache=shared")
+    conn = get_connection()
+    conn.execute(
+        "CREATE TABLE habits (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+        "description TEXT, periodicity TEXT NOT NULL, start_date TEXT NOT NULL, "
+        "next_due_date TEXT, deleted_at TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO habits (id, name, description, periodicity, start_date) "
+        "VALUES (1, 'Old', '', 'daily', '2025-01-01')"
+    )
+    conn.execute(
+        "CREATE TABLE completions (id INTEGER PRIMARY KEY, habit_id INTEGER NOT NULL, "
+        "completion_date TEXT NOT NULL, "
+        "FOREIGN KEY(habit_id) REFERENCES habits(id) ON DELETE CASCADE)"
+    )
+    conn.execute("INSERT INTO completions VALUES (1, 1, '2025-01-01')")
+    # Habit 2 and completion 2 were purged, but the event log remembers them
+    conn.execute(
+        "CREATE TABLE events (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "type TEXT NOT NULL, habit_id INTEGER NOT NULL, completion_id INTEGER, "
+        "completion_date TEXT, payload TEXT, "
+        "recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute(
+        "INSERT INTO events (type, habit_id, completion_id) VALUES ('completed', 2, 2)"
+    )
+    conn.commit()
+
+    init_db()
+
+    assert [c["id"] for c in query_completions_by_habit_id(1)] == [1]
+    habit_id = add_habit(habit_factory())
+    assert habit_id == 3
+    completion_id = add_completion(
+        {"habit_id": habit_id, "completion_date": "2025-01-02"}
+    )
+    assert completion_id == 3
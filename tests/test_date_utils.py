@@ -0,0 +1,36 @@
+import datetime
+
+import pytest
+
+from src.infra.date_utils import parse_date, parse_duration, parse_ordinals
+
+
+def test_parse_date_matches_iso_format():
+    """Decode valid YYYY-MM-DD strings to the same date as the standard library."""
+    assert parse_date("2025-01-31") == datetime.date(2025, 1, 31)
+    assert parse_date("2024-02-29") == datetime.date(2024, 2, 29)
+
+
+@pytest.mark.parametrize(
+    "value", ["20250101", "2025-W01-1", "2025-1-01", "2025-02-30", "", "2025-01-01T"]
+)
+def test_parse_date_rejects_other_formats(value):
+    """Reject anything that is not a valid date in exactly YYYY-MM-DD form."""
+    with pytest.raises(ValueError):
+        parse_date(value)
+
+
+def test_parse_ordinals_decodes_column():
+    """Decode a column of dates to ordinals, preserving order and duplicates."""
+    values = ["2025-01-02", "2025-01-01", "2025-01-02"]
+    expected = [datetime.date.fromisoformat(v).toordinal() for v in values]
+    assert parse_ordinals(values) == expected
+
+
+def test_parse_duration():
+    """Accept plain days, a d suffix or a w suffix."""
+    assert parse_duration("3") == 3
+    assert parse_duration("1d") == 1
+    assert parse_duration("2w") == 14
+    with pytest.raises(ValueError):
+        parse_duration("soon")
@@ -0,0 +1,116 @@
+from src.infra.database import (
+    add_completion,
+    add_completions,
+    add_habit,
+    delete_completions_on_date,
+    delete_habit_by_id,
+    get_connection,
+    query_completions_by_habit_id,
+)
+from src.infra.event_log import (
+    checkpoint,
+    last_checkpoint,
+    rebuild_projections,
+    replay_events,
+    sweep_orphans,
+)
+from src.infra.purge import purge_deleted_habits
+
+
+def dump_projections() -> tuple[list, list]:
+    conn = get_connection()
+    habits = conn.execute("SELECT * FROM habits ORDER BY id").fetchall()
+    completions = conn.execute("SELECT * FROM completions ORDER BY id").fetchall()
+    return habits, completions
+
+
+def test_purge_removes_deleted_habit_completions(habit_factory):
+    """Deleting a habit keeps its completions until the habit is purged."""
+    habit_id = add_habit(habit_factory())
+    assert habit_id is not None
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+
+    assert delete_habit_by_id(habit_id)
+    assert not delete_habit_by_id(habit_id)
+    assert len(dump_projections()[1]) == 1
+    assert purge_deleted_habits() == (1, 1)
+    assert dump_projections()[1] == []
+
+
+def test_rebuild_projections_matches_live_tables(habit_factory):
+    """Replaying the whole log reproduces the habits and completions tables."""
+    kept = add_habit(habit_factory(name="Kept", periodicity="weekly"))
+    deleted = add_habit(habit_factory(name="Deleted"))
+    assert kept is not None and deleted is not None
+
+    add_completion({"habit_id": kept, "completion_date": "2025-01-01"})
+    add_completions(
+        [
+            {"habit_id": kept, "completion_date": "2025-01-08"},
+            {"habit_id": deleted, "completion_date": "2025-01-02"},
+        ]
+    )
+    delete_habit_by_id(deleted)
+    purge_deleted_habits()
+
+    # The purged habit's ID is never handed out again
+    created = add_habit(habit_factory(name="Created"))
+    assert created is not None and created > deleted
+    add_completion({"habit_id": created, "completion_date": "2025-02-01"})
+
+    expected = dump_projections()
+    seq = rebuild_projections()
+    assert dump_projections() == expected
+    assert last_checkpoint() == seq
+
+
+def test_replay_events_applies_only_new_events(habit_factory):
+    """Incremental replay catches projections up from the latest checkpoint."""
+    habit_id = add_habit(habit_factory())
+    assert habit_id is not None
+    checkpoint()
+
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+    expected = dump_projections()
+
+    # Lose the projection row written after the checkpoint, then catch up
+    get_connection().execute("DELETE FROM completions")
+    replay_events()
+    assert dump_projections() == expected
+
+
+def test_sweep_orphans_removes_completions_without_habit(habit_factory):
+    """Completions left behind while foreign keys were off get removed."""
+    habit_id = add_habit(habit_factory())
+    conn = get_connection()
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute(
+        "INSERT INTO completions (habit_id, completion_date) VALUES (999, '2025-01-01')"
+    )
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+
+    assert sweep_orphans() == 1
+    assert len(dump_projections()[1]) == 1
+
+
+def test_rebuild_projections_applies_uncompleted(habit_factory):
+    """Replay removals, including of the latest completion."""
+    habit_id = add_habit(habit_factory())
+    assert habit_id is not None
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-02"})
+
+    assert delete_completions_on_date(habit_id, "2025-01-02") == 1
+    # The removed completion's ID is not reissued
+    add_completion({"habit_id": habit_id, "completion_date": "2025-01-03"})
+    assert [c["id"] for c in query_completions_by_habit_id(habit_id)] == [1, 3]
+    assert delete_completions_on_date(habit_id, "2025-01-01") == 1
+
+    expected = dump_projections()
+    rebuild_projections()
+    assert dump_projections() == expected
+    assert [c["completion_date"] for c in query_completions_by_habit_id(habit_id)] == [
+        "2025-01-03"
+    ]
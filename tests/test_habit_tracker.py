@@ -2,13 +2,27 @@ import datetime
 
 import pytest
 
+from src.core.analytics import get_streak_by_habit_id, stream_habits
+from src.core.clock import FixedClock
 from src.core.habit_tracker import HabitTracker
 from src.core.model import CreateHabitBody, HabitType
 from src.infra.database import (
     add_completion,
+    configure_database,
+    init_db,
+    query_completion_dates_by_habit_id,
+    query_due_habits,
     query_habit_by_id,
     query_latest_completion_by_habit_id,
 )
+from src.infra.write_buffer import CompletionWriteBuffer
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    # The write buffer's thread needs a connection of its own
+    configure_database(tmp_path / "habits.db")
+    init_db()
 
 
 def test_create_habit(habit_factory):
@@ -24,6 +38,18 @@ def test_create_habit(habit_factory):
     assert habit["name"] == habit["name"]
 
 
+def test_create_habit_validates_periodicity(habit_factory):
+    """Normalise the periodicity spec and refuse ones analytics cannot read."""
+    tracker = HabitTracker()
+    habit_id = tracker.create_habit(habit_factory(periodicity=" Weekdays:FRI,mon "))
+    assert habit_id is not None
+    habit = query_habit_by_id(habit_id)
+    assert habit is not None and habit["periodicity"] == "weekdays:mon,fri"
+
+    with pytest.raises(ValueError):
+        tracker.create_habit(habit_factory(periodicity="fortnightly"))
+
+
 def test_delete_habit(habit_factory):
     """Ensure habit deletion removes the record and associated completions."""
     tracker = HabitTracker()
@@ -99,3 +125,126 @@ def test_complete_habit_after_period_allows(habit_factory):
     # Should now allow completion
     new_completion_id = tracker.complete_habit(habit_id)
     assert new_completion_id is not None
+
+
+def test_write_buffer_refuses_memory_database():
+    """The writer thread cannot share the single in-memory connection."""
+    with pytest.raises(RuntimeError):
+        CompletionWriteBuffer()
+
+
+def test_buffered_completion_visible_before_flush(habit_factory, file_db):
+    """Queued completions count for the once-per-period check and land on flush."""
+    # Long interval and batch size so only the explicit flush writes
+    write_buffer = CompletionWriteBuffer(max_batch=1000, flush_interval=60)
+    tracker = HabitTracker(write_buffer=write_buffer)
+
+    habit_id = tracker.create_habit(habit_factory())
+    assert habit_id is not None
+
+    assert tracker.complete_habit(habit_id) is None, "Buffered completion has no ID"
+    assert query_latest_completion_by_habit_id(habit_id) is None
+
+    with pytest.raises(ValueError) as e:
+        tracker.complete_habit(habit_id)
+    assert "Cannot complete habit twice" in str(e.value)
+
+    assert write_buffer.flush() == 1
+    latest = query_latest_completion_by_habit_id(habit_id)
+    assert latest is not None, "Flushed completion not found in DB"
+    assert write_buffer.latest_pending_date(habit_id) is None
+
+    write_buffer.close()
+
+
+def test_buffered_backdated_completions_check_all_neighbours(habit_factory, file_db):
+    """Backdating behind queued completions still allows one per period."""
+    write_buffer = CompletionWriteBuffer(max_batch=1000, flush_interval=60)
+    tracker = HabitTracker(write_buffer=write_buffer, clock=FixedClock("2025-01-31"))
+    habit_id = tracker.create_habit(habit_factory(periodicity="weekly"))
+    assert habit_id is not None
+
+    tracker.complete_habit(habit_id, datetime.date(2025, 1, 20))
+    tracker.complete_habit(habit_id, datetime.date(2025, 1, 1))
+    with pytest.raises(ValueError):
+        tracker.complete_habit(habit_id, datetime.date(2025, 1, 3))
+
+    write_buffer.close()
+    assert query_completion_dates_by_habit_id(habit_id) == ["2025-01-01", "2025-01-20"]
+
+
+def test_complete_habit_uses_tracker_clock(habit_factory):
+    """Replay several days of completions in one process with a fixed clock."""
+    clock = FixedClock("2025-03-01")
+    tracker = HabitTracker(clock=clock)
+    habit_id = tracker.create_habit(habit_factory(start_date="2025-03-01"))
+    assert habit_id is not None
+
+    for _ in range(5):
+        tracker.complete_habit(habit_id)
+        clock.advance()
+
+    latest = query_latest_completion_by_habit_id(habit_id)
+    assert latest is not None and latest["completion_date"] == "2025-03-05"
+    assert get_streak_by_habit_id(habit_id, today=clock.today()) == 5
+    assert get_streak_by_habit_id(habit_id, today=clock.advance(2)) == 0
+
+
+def test_backdated_completion_checks_neighbours(habit_factory):
+    """Allow backdated completions unless they share a period with a neighbour."""
+    tracker = HabitTracker(clock=FixedClock("2025-01-31"))
+    habit_id = tracker.create_habit(habit_factory(periodicity="weekly"))
+    assert habit_id is not None
+    for day in ["2025-01-01", "2025-01-15"]:
+        add_completion({"habit_id": habit_id, "completion_date": day})
+
+    # Within a week after the earlier and before the later completion
+    for day in [datetime.date(2025, 1, 5), datetime.date(2025, 1, 10)]:
+        with pytest.raises(ValueError, match="twice in the same period"):
+            tracker.complete_habit(habit_id, day)
+
+    assert tracker.complete_habit(habit_id, datetime.date(2025, 1, 8)) is not None
+    with pytest.raises(ValueError, match="future"):
+        tracker.complete_habit(habit_id, datetime.date(2025, 2, 1))
+
+
+def test_uncomplete_habit(habit_factory):
+    """Remove a completion and move the due date back to the previous one."""
+    tracker = HabitTracker(clock=FixedClock("2025-01-03"))
+    habit_id = tracker.create_habit(habit_factory())
+    assert habit_id is not None
+    for day in [1, 2, 3]:
+        tracker.complete_habit(habit_id, datetime.date(2025, 1, day))
+
+    assert tracker.uncomplete_habit(habit_id, datetime.date(2025, 1, 3))
+    assert not tracker.uncomplete_habit(habit_id, datetime.date(2025, 1, 3))
+    assert query_completion_dates_by_habit_id(habit_id) == ["2025-01-01", "2025-01-02"]
+    due = query_due_habits("2025-01-01", "2025-01-31")
+    assert [(h["id"], h["next_due_date"]) for h in due] == [(habit_id, "2025-01-03")]
+
+    # The freed day can be completed again
+    assert tracker.complete_habit(habit_id) is not None
+
+
+def test_tag_habit(habit_factory):
+    """Group habits by tag, ignoring repeats, and drop tags with the habit."""
+    tracker = HabitTracker()
+    walk = tracker.create_habit(habit_factory(name="Walk"))
+    read = tracker.create_habit(habit_factory(name="Read", periodicity="weekly"))
+    assert walk is not None and read is not None
+
+    assert tracker.tag_habit(walk, ["team", " team "]) == 1
+    assert tracker.tag_habit(read, ["team", "programme"]) == 2
+    assert tracker.tag_habit(walk, ["team"]) == 0
+    assert [h["id"] for h in stream_habits(tag="team")] == [walk, read]
+    assert [h["id"] for h in stream_habits("weekly", tag="team")] == [read]
+
+    with pytest.raises(ValueError):
+        tracker.tag_habit(walk, [" "])
+    with pytest.raises(ValueError):
+        tracker.tag_habit(999, ["team"])
+
+    assert tracker.untag_habit(read, ["programme", "unknown"]) == 1
+    assert list(stream_habits(tag="programme")) == []
+    tracker.delete_habit(walk)
+    assert [h["id"] for h in stream_habits(tag="team")] == [read]
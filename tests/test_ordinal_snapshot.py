@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+from src.core.analytics import get_longest_streak_by_id, stream_snapshot_streaks
+from src.infra.database import add_completion, add_habit
+from src.infra.ordinal_snapshot import OrdinalSnapshot, export_ordinal_snapshot
+
+
+def test_export_and_read_snapshot(habit_factory, tmp_path):
+    """Round-trip habits and completion days through a snapshot file."""
+    daily = add_habit(habit_factory(name="Läufen"))
+    monthly = add_habit(habit_factory(name="Budget", periodicity="monthly"))
+    empty = add_habit(habit_factory(name="Never"))
+    for day in ["2025-01-03", "2025-01-01", "2025-01-02"]:
+        add_completion({"habit_id": daily, "completion_date": day})
+    add_completion({"habit_id": monthly, "completion_date": "2025-02-10"})
+
+    path = tmp_path / "habits.ord"
+    assert export_ordinal_snapshot(path) == (3, 4)
+
+    with OrdinalSnapshot(path) as snapshot:
+        assert len(snapshot) == 3
+        i = snapshot.position(daily)
+        assert snapshot.name(i) == "Läufen"
+        assert snapshot.periodicity(i) == "daily"
+        assert list(snapshot.ordinals(i)) == [
+            datetime.date(2025, 1, day).toordinal() for day in [1, 2, 3]
+        ]
+        assert snapshot.periodicity(snapshot.position(monthly)) == "monthly"
+        assert len(snapshot.ordinals(snapshot.position(empty))) == 0
+
+        with pytest.raises(KeyError):
+            snapshot.position(999)
+
+
+def test_snapshot_streaks_match_database(habit_factory, tmp_path):
+    """Compute the same streaks from a snapshot as from the database."""
+    habit_id = add_habit(habit_factory())
+    for day in [1, 2, 3, 5, 6]:
+        add_completion({"habit_id": habit_id, "completion_date": f"2025-01-{day:02d}"})
+
+    path = tmp_path / "habits.ord"
+    export_ordinal_snapshot(path)
+    with OrdinalSnapshot(path) as snapshot:
+        streaks = list(
+            stream_snapshot_streaks(snapshot, today=datetime.date(2025, 1, 7))
+        )
+
+    assert streaks == [
+        {
+            "id": habit_id,
+            "streak": 2,
+            "longest_streak": get_longest_streak_by_id(habit_id),
+        }
+    ]
+
+
+def test_rejects_other_files(tmp_path):
+    """Refuse to map files that are not ordinal snapshots."""
+    path = tmp_path / "habits.db"
+    path.write_bytes(b"SQLite format 3\0" + bytes(100))
+    with pytest.raises(ValueError):
+        OrdinalSnapshot(path)
@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+
+from src.core.analytics import get_longest_streak_by_id
+from src.core.periodicity import Cadence, get_cadence
+from src.infra.database import add_completion, add_habit
+from src.infra.date_utils import get_next_due_date
+
+
+def ordinal(value: str) -> int:
+    return datetime.date.fromisoformat(value).toordinal()
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("daily", "daily"),
+        ("Weekly", "weekly"),
+        ("every:03", "every:3"),
+        ("weekdays:fri,mon,fri", "weekdays:mon,fri"),
+        ("calendar-weekly", "calendar-weekly"),
+        ("monthly", "monthly"),
+    ],
+)
+def test_get_cadence_normalises_spec(spec, expected):
+    """Parse every supported spec and normalise it for storage."""
+    assert get_cadence(spec).spec == expected
+
+
+@pytest.mark.parametrize("spec", ["yearly", "every:0", "every:x", "weekdays:", ""])
+def test_get_cadence_rejects_unknown_spec(spec):
+    """Reject specs that do not name a supported periodicity."""
+    with pytest.raises(ValueError):
+        get_cadence(spec)
+
+
+def test_incomplete_cadence_cannot_be_created():
+    """A cadence without start_of() fails when created, not on first use."""
+
+    class NoStart(Cadence):
+        def index(self, ordinal: int) -> int:
+            return ordinal
+
+    with pytest.raises(TypeError, match="start_of"):
+        NoStart()
+
+
+def test_period_boundaries():
+    """Map dates to the period they fall in and back to its first day."""
+    week = get_cadence("calendar-weekly")
+    # 2025-01-05 is a Sunday, 2025-01-06 the following Monday
+    assert week.index(ordinal("2025-01-05")) + 1 == week.index(ordinal("2025-01-06"))
+    assert week.start_of(week.index(ordinal("2025-01-08"))) == ordinal("2025-01-06")
+
+    month = get_cadence("monthly")
+    assert month.start_of(month.index(ordinal("2024-02-29"))) == ordinal("2024-02-01")
+
+    mon_thu = get_cadence("weekdays:mon,thu")
+    # Wednesday still belongs to Monday's period, Thursday starts the next one
+    assert mon_thu.index(ordinal("2025-01-08")) == mon_thu.index(ordinal("2025-01-06"))
+    assert (
+        mon_thu.index(ordinal("2025-01-09")) == mon_thu.index(ordinal("2025-01-06")) + 1
+    )
+    # Sunday belongs to the previous Thursday
+    assert mon_thu.start_of(mon_thu.index(ordinal("2025-01-12"))) == ordinal(
+        "2025-01-09"
+    )
+
+
+@pytest.mark.parametrize(
+    "spec, last, due",
+    [
+        ("daily", "2025-01-01", "2025-01-02"),
+        ("biweekly", "2025-01-01", "2025-01-15"),
+        ("every:3", "2025-01-01", "2025-01-04"),
+        ("calendar-weekly", "2025-01-08", "2025-01-19"),
+        ("monthly", "2025-01-31", "2025-02-28"),
+        ("weekdays:mon,thu", "2025-01-06", "2025-01-12"),
+    ],
+)
+def test_get_next_due_date(spec, last, due):
+    """Keep a streak alive until the end of the period after the latest one."""
+    assert get_next_due_date(spec, last) == due
+
+
+def test_monthly_streak_spans_calendar_months(habit_factory):
+    """Count completions in consecutive months as a streak, whatever the day."""
+    habit_id = add_habit(habit_factory(periodicity="monthly"))
+    for date in ["2025-01-01", "2025-02-28", "2025-03-01", "2025-05-15"]:
+        add_completion({"habit_id": habit_id, "completion_date": date})
+
+    assert get_longest_streak_by_id(habit_id) == 3
@@ -0,0 +1,126 @@
+import datetime
+
+import pytest
+
+from src.core.analytics import get_due_habits, get_habits, get_stats, stream_habits
+from src.core.change_feed import get_changes
+from src.core.habit_tracker import HabitTracker
+from src.infra.dao import HabitDAO
+from src.infra.database import (
+    add_completions,
+    get_connection,
+    query_completions_by_habit_id,
+    query_habit_by_id,
+    query_latest_completion_by_habit_id,
+)
+from src.infra.event_log import checkpoint, replay_events
+from src.infra.purge import purge_deleted_habits
+
+
+def stored_completions(habit_id: int) -> int:
+    """Completion rows kept for a habit, deleted or not."""
+    return (
+        get_connection()
+        .execute("SELECT COUNT(*) FROM completions WHERE habit_id = ?", (habit_id,))
+        .fetchone()[0]
+    )
+
+
+def test_deleted_habit_is_hidden_until_purged(habit_factory):
+    """Soft-deleted habits disappear from every read but keep their rows."""
+    tracker = HabitTracker()
+    kept = tracker.create_habit(habit_factory(name="Kept"))
+    deleted = tracker.create_habit(habit_factory(name="Deleted"))
+    assert kept is not None and deleted is not None
+    tracker.tag_habit(kept, ["team"])
+    tracker.tag_habit(deleted, ["team"])
+    today = datetime.date.today().isoformat()
+    add_completions(
+        [
+            {"habit_id": kept, "completion_date": today},
+            {"habit_id": deleted, "completion_date": today},
+        ]
+    )
+
+    assert tracker.delete_habit(deleted)
+
+    assert query_habit_by_id(deleted) is None
+    assert [h["id"] for h in get_habits()] == [kept]
+    assert [h["id"] for h in stream_habits(tag="team")] == [kept]
+    assert [s["id"] for s in get_stats()] == [kept]
+    assert [h["id"] for h in get_due_habits(within_days=7)] == [kept]
+    with pytest.raises(ValueError):
+        tracker.complete_habit(deleted)
+    assert query_completions_by_habit_id(deleted) == []
+    assert query_latest_completion_by_habit_id(deleted) is None
+    dao = HabitDAO()
+    assert dao.completions_by_habit_id(deleted) == []
+    assert dao.latest_completion_by_habit_id(deleted) is None
+    dao.close()
+    assert stored_completions(deleted) == 1
+
+
+def test_purge_works_in_chunks_and_reports_progress(habit_factory):
+    """Remove a deleted habit's completions a chunk per transaction."""
+    tracker = HabitTracker()
+    kept = tracker.create_habit(habit_factory(name="Kept"))
+    deleted = tracker.create_habit(habit_factory(name="Deleted"))
+    assert kept is not None and deleted is not None
+    tracker.tag_habit(deleted, ["team"])
+    add_completions(
+        [{"habit_id": kept, "completion_date": "2025-01-01"}]
+        + [
+            {"habit_id": deleted, "completion_date": f"2025-01-{day:02d}"}
+            for day in range(1, 8)
+        ]
+    )
+    tracker.delete_habit(deleted)
+
+    progress = []
+    assert purge_deleted_habits(
+        chunk_size=3, on_progress=lambda *args: progress.append(args)
+    ) == (1, 7)
+    assert progress == [(deleted, 3), (deleted, 6), (deleted, 7)]
+
+    conn = get_connection()
+    assert conn.execute("SELECT id FROM habits").fetchall() == [(kept,)]
+    assert conn.execute("SELECT COUNT(*) FROM habit_tags").fetchone()[0] == 0
+    assert len(query_completions_by_habit_id(kept)) == 1
+    assert purge_deleted_habits() == (0, 0)
+
+
+def test_replayed_delete_leaves_a_tombstone(habit_factory):
+    """Replaying a delete hides the habit without removing its history."""
+    tracker = HabitTracker()
+    habit_id = tracker.create_habit(habit_factory())
+    assert habit_id is not None
+    add_completions([{"habit_id": habit_id, "completion_date": "2025-01-01"}])
+    checkpoint()
+    tracker.delete_habit(habit_id)
+
+    # Lose the tombstone written after the checkpoint, then catch up
+    conn = get_connection()
+    conn.execute("UPDATE habits SET deleted_at = NULL")
+    conn.commit()
+    replay_events()
+
+    assert query_habit_by_id(habit_id) is None
+    assert stored_completions(habit_id) == 1
+    assert purge_deleted_habits() == (1, 1)
+
+
+def test_purged_ids_are_never_reissued(habit_factory):
+    """A habit created after a purge gets a fresh ID in the change feed."""
+    tracker = HabitTracker()
+    purged = tracker.create_habit(habit_factory(name="Purged"))
+    assert purged is not None
+    tracker.delete_habit(purged)
+    purge_deleted_habits()
+
+    created = tracker.create_habit(habit_factory(name="Created"))
+    assert created is not None and created > purged
+    assert [
+        (c["habit_id"], c["habit"]["name"])
+        for c in get_changes()
+        if c["type"] == "habit_created"
+    ] == [(purged, "Purged"), (created, "Created")]
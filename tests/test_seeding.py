@@ -0,0 +1,102 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from src.core.analytics import get_longest_streak_by_id
+from src.infra import database
+from src.infra.database import (
+    configure_database,
+    get_connection,
+    init_db,
+    query_completions_by_habit_id,
+    query_habits,
+)
+from src.infra.seeding import seed_habits
+
+TODAY = datetime.date(2025, 6, 30)
+
+
+def dump() -> list[tuple]:
+    return (
+        get_connection()
+        .execute(
+            "SELECT h.id, h.periodicity, h.start_date, c.completion_date "
+            "FROM habits h JOIN completions c ON c.habit_id = h.id ORDER BY c.id"
+        )
+        .fetchall()
+    )
+
+
+def test_seed_habits_is_deterministic():
+    """Same arguments produce the same dataset, a different seed does not."""
+    assert seed_habits(20, years=1, miss_rate=0.2, seed=7, today=TODAY)[0] == 20
+    first = dump()
+
+    configure_database("file:seed-again?mode=memory&cache=shared")
+    init_db()
+    seed_habits(20, years=1, miss_rate=0.2, seed=7, today=TODAY)
+    assert dump() == first, "Seeded data differs between runs"
+
+    configure_database("file:seed-other?mode=memory&cache=shared")
+    init_db()
+    seed_habits(20, years=1, miss_rate=0.2, seed=8, today=TODAY)
+    assert dump() != first, "Different seeds should give different data"
+
+
+def test_seed_habits_without_misses_gives_full_streaks():
+    """With a zero miss rate every habit is completed once per period."""
+    habits, completions = seed_habits(5, years=1, miss_rate=0.0, seed=1, today=TODAY)
+    assert habits == 5
+
+    total = 0
+    for habit in query_habits():
+        count = len(query_completions_by_habit_id(habit["id"]))
+        assert get_longest_streak_by_id(habit["id"]) == count
+        total += count
+    assert total == completions
+
+
+def test_seed_habits_restores_indexes():
+    """Indexes dropped for the bulk load exist again afterwards."""
+    seed_habits(3, years=1, seed=1, today=TODAY)
+    indexes = {
+        row[0]
+        for row in get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    assert {"idx_completions_habit_date", "idx_habits_next_due_date"} <= indexes
+
+
+def test_seed_habits_restores_synchronous():
+    """Syncing returns to the level set before the bulk load."""
+    conn = get_connection()
+    conn.execute("PRAGMA synchronous = NORMAL")
+    seed_habits(3, years=1, seed=1, today=TODAY)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+@pytest.mark.parametrize("habit_count, years", [(0, 1), (-5, 1), (3, 0), (3, -1)])
+def test_seed_habits_rejects_empty_ranges(habit_count, years):
+    """Nothing to seed, or a history ending in the future, is an error."""
+    with pytest.raises(ValueError):
+        seed_habits(habit_count, years=years, today=TODAY)
+    assert query_habits() == []
+
+
+def test_seed_habits_closes_file_connection(tmp_path, monkeypatch):
+    """The connection opened for a database file is closed afterwards."""
+    configure_database(tmp_path / "seed.db")
+    init_db()
+    opened = []
+    connect = database._connect
+    monkeypatch.setattr(
+        database, "_connect", lambda *args: opened.append(connect(*args)) or opened[-1]
+    )
+
+    seed_habits(3, years=1, seed=1, today=TODAY)
+
+    assert opened
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
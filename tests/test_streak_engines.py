@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+
+from tests.streak_harness import (
+    SPECS,
+    STREAK_ENGINES,
+    check_engines,
+    load_random_histories,
+    reference_streaks,
+)
+
+TODAY = datetime.date(2025, 6, 30)
+
+
+def days(*values: str) -> list[datetime.date]:
+    return [datetime.date.fromisoformat(value) for value in values]
+
+
+@pytest.mark.parametrize(
+    "spec, dates, expected",
+    [
+        ("daily", [], (0, 0)),
+        # Duplicates count; a one-day gap breaks a daily streak
+        ("daily", days("2025-06-27", "2025-06-27", "2025-06-29"), (1, 2)),
+        ("every:3", days("2025-06-24", "2025-06-27", "2025-06-30"), (3, 3)),
+        ("weekly", days("2025-06-01", "2025-06-09"), (0, 1)),
+        # Monday to the Sunday 13 days later is still the next week, but
+        # today is two weeks on
+        ("calendar-weekly", days("2025-06-09", "2025-06-22"), (0, 2)),
+        ("monthly", days("2025-03-01", "2025-04-30", "2025-06-01"), (1, 2)),
+        # Monday's period runs until Wednesday; Monday to next Monday skips one
+        ("weekdays:mon,thu", days("2025-06-16", "2025-06-23", "2025-06-26"), (2, 2)),
+    ],
+)
+def test_reference_oracle(spec, dates, expected):
+    """Pin down the oracle itself on hand-checked histories."""
+    assert reference_streaks(spec, dates, TODAY) == expected
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_streak_engines_match_reference_oracle(seed):
+    """Every registered streak engine agrees with the oracle on random histories."""
+    histories = load_random_histories(
+        habit_count=25 * len(SPECS), years=3, today=TODAY, seed=seed
+    )
+    assert sum(len(dates) for _, dates in histories.values()) > 10_000
+
+    timings = check_engines(histories, TODAY)
+    assert timings.keys() == STREAK_ENGINES.keys()
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from src.infra.database import (
+    add_completion,
+    add_habit,
+    get_connection,
+    query_completions_by_habit_id,
+    query_habits,
+)
+from src.infra.write_batch import WriteBatch
+
+
+def test_failed_operation_is_undone_alone(habit_factory):
+    """Roll back a failing operation without losing the ones around it."""
+    with WriteBatch() as batch:
+        with batch.operation():
+            habit_id = add_habit(habit_factory(name="Kept"))
+
+        with pytest.raises(sqlite3.IntegrityError):
+            with batch.operation():
+                add_habit(habit_factory(name="Undone"))
+                add_completion({"habit_id": 999, "completion_date": "2025-01-01"})
+
+        with batch.operation():
+            add_completion({"habit_id": habit_id, "completion_date": "2025-01-01"})
+
+    assert (batch.succeeded, batch.failed) == (2, 1)
+    assert [h["name"] for h in query_habits()] == ["Kept"]
+    assert len(query_completions_by_habit_id(habit_id)) == 1
+
+
+def test_commit_every(habit_factory):
+    """Commit after every N operations and roll back whatever is left on error."""
+    with pytest.raises(RuntimeError):
+        with WriteBatch(commit_every=2) as batch:
+            for name in ["a", "b", "c"]:
+                with batch.operation():
+                    add_habit(habit_factory(name=name))
+            assert get_connection().in_transaction
+            raise RuntimeError("interrupted")
+
+    assert [h["name"] for h in query_habits()] == ["a", "b"]